@@ -0,0 +1,125 @@
+# bench_gateway.py — full intents vs lean gateway mode on a synthetic large guild
+# usage: python bench_gateway.py [members] [seconds of traffic]
+# Builds the ConnectionState of each mode offline, feeds it the GUILD_CREATE and the
+# event mix Discord would deliver for its intents, and reports retained memory and
+# events handled per second of simulated traffic.
+import random
+import sys
+import time
+import tracemalloc
+
+import discord
+from discord.ext import commands
+
+import gateway
+
+GUILD_ID = 1_000_000_000_000_000
+BOT_ID = 999
+CHANNELS = 200
+# events per second in a busy 50k-member guild, with the intent Discord gates them behind
+EVENT_RATES = {
+    "PRESENCE_UPDATE": (400, "presences"),
+    "TYPING_START": (40, "typing"),
+    "MESSAGE_CREATE": (25, "guild_messages"),
+    "GUILD_MEMBER_UPDATE": (5, "members"),
+}
+
+
+def user_payload(uid: int) -> dict:
+    return {"id": str(uid), "username": f"user{uid}", "discriminator": "0", "global_name": None, "avatar": None}
+
+
+def member_payload(uid: int) -> dict:
+    return {"user": user_payload(uid), "roles": [str(GUILD_ID + 1 + uid % 20)], "joined_at": "2024-01-01T00:00:00+00:00",
+            "deaf": False, "mute": False, "flags": 0}
+
+
+def guild_payload(members: int, intents: discord.Intents) -> dict:
+    roles = [{"id": str(GUILD_ID + i), "name": f"role{i}", "permissions": "0", "position": i, "color": 0,
+              "hoist": False, "managed": False, "mentionable": False} for i in range(21)]
+    channels = [{"id": str(GUILD_ID + 100 + i), "type": 0, "name": f"kanal-{i}", "position": i,
+                 "permission_overwrites": [], "guild_id": str(GUILD_ID)} for i in range(CHANNELS)]
+    data = {"id": str(GUILD_ID), "name": "fixture", "owner_id": str(BOT_ID), "roles": roles, "channels": channels,
+            "member_count": members, "large": True, "emojis": [], "stickers": [], "features": [],
+            "members": [member_payload(BOT_ID)], "presences": []}
+    if intents.members:
+        # what chunking eventually delivers
+        data["members"] += [member_payload(uid) for uid in range(1, members + 1)]
+    if intents.presences:
+        data["presences"] = [{"user": {"id": str(uid)}, "status": "online", "activities": [], "client_status": {}}
+                             for uid in range(1, members + 1, 3)]
+    return data
+
+
+def event_payload(kind: str, members: int, seq: int) -> dict:
+    uid = random.randint(1, members)
+    channel_id = str(GUILD_ID + 100 + uid % CHANNELS)
+    if kind == "PRESENCE_UPDATE":
+        return {"guild_id": str(GUILD_ID), "user": {"id": str(uid)}, "status": random.choice(("online", "idle")),
+                "activities": [], "client_status": {}}
+    if kind == "TYPING_START":
+        return {"guild_id": str(GUILD_ID), "channel_id": channel_id, "user_id": str(uid), "timestamp": 0,
+                "member": member_payload(uid)}
+    if kind == "MESSAGE_CREATE":
+        return {"id": str(GUILD_ID + 10_000 + seq), "guild_id": str(GUILD_ID), "channel_id": channel_id,
+                "author": user_payload(uid), "member": member_payload(uid), "content": "x" * 60, "type": 0,
+                "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None, "tts": False,
+                "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [], "embeds": [],
+                "pinned": False, "flags": 0}
+    return {"guild_id": str(GUILD_ID), **member_payload(uid)}
+
+
+def run(label: str, options: dict, members: int, seconds: int) -> dict:
+    bot = commands.Bot(command_prefix="!", **options)
+    state = bot._connection
+    intents = options["intents"]
+    state.user = discord.ClientUser(state=state, data=user_payload(BOT_ID) | {"bot": True})
+    state.dispatch = lambda *args, **kwargs: None  # measure parsing and caching, not listeners
+
+    tracemalloc.start()
+    state._get_create_guild(guild_payload(members, intents))
+    after_guild = tracemalloc.get_traced_memory()[0]
+
+    # Discord only sends what the intents subscribe to
+    stream = [kind for kind, (rate, intent) in EVENT_RATES.items() if getattr(intents, intent) for _ in range(rate)]
+    delivered = 0
+    start = time.perf_counter()
+    for second in range(seconds):
+        random.shuffle(stream)
+        for seq, kind in enumerate(stream):
+            state.parsers[kind](event_payload(kind, members, second * 10_000 + seq))
+            delivered += 1
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    guild = bot.get_guild(GUILD_ID)
+    return {
+        "mode": label,
+        "cached members": len(guild.members),
+        "cached messages": len(state._messages or ()),
+        "memory after GUILD_CREATE (MiB)": after_guild / 2**20,
+        "memory after traffic (MiB)": retained / 2**20,
+        "peak memory (MiB)": peak / 2**20,
+        "events/s delivered": delivered / seconds,
+        "CPU per simulated s (ms)": elapsed / seconds * 1000,
+    }
+
+
+def main():
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    results = [run("full", gateway.client_options(lean=False), members, seconds),
+               run("lean", gateway.client_options(lean=True), members, seconds)]
+    print(f"{members} członków, {seconds} s ruchu")
+    print(f"  {'':<34}{'full':>14}{'lean':>14}")
+    for key in results[0]:
+        if key == "mode":
+            continue
+        values = "".join(f"{r[key]:>14.1f}" if isinstance(r[key], float) else f"{r[key]:>14}" for r in results)
+        print(f"  {key:<34}{values}")
+
+
+if __name__ == "__main__":
+    main()
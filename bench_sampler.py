@@ -0,0 +1,56 @@
+# bench_sampler.py — giveaway draw: old list approach vs ParticipantSet
+# usage: python bench_sampler.py [entrants] [winners]
+# (winners close to entrants exercises the Fenwick-tree fallback of weighted draws)
+import random
+import sys
+import time
+
+from participants import ParticipantSet
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    ids = random.sample(range(10**17, 10**18), n)
+
+    # old layout: list of decimal strings
+    legacy = [str(uid) for uid in ids]
+    plain = ParticipantSet(ids)
+    weighted = ParticipantSet(ids, [random.choice((1, 1, 1, 2, 3)) for _ in ids])
+    previous = random.sample(ids, k)
+    previous_str = [str(uid) for uid in previous]
+    probe = ids[n // 2]
+
+    rows = [
+        ("join duplicate check (list)", timed(lambda: str(probe) in legacy)),
+        ("join duplicate check (ParticipantSet)", timed(lambda: probe in plain)),
+        (f"draw {k} (list, random.sample)", timed(lambda: random.sample(legacy, k))),
+        (f"draw {k} (ParticipantSet, unweighted)", timed(lambda: plain.draw(k))),
+        (f"draw {k} (ParticipantSet, weighted)", timed(lambda: weighted.draw(k))),
+        (f"reroll {k} (list comprehension)", timed(
+            lambda: random.sample(pool := [p for p in legacy if p not in previous_str], min(k, len(pool))))),
+        (f"reroll {k} (ParticipantSet, unweighted)", timed(lambda: plain.draw(k, exclude=previous))),
+        (f"reroll {k} (ParticipantSet, weighted)", timed(lambda: weighted.draw(k, exclude=previous))),
+    ]
+
+    print(f"{n} uczestników, {k} zwycięzców (najlepszy z 5 przebiegów)")
+    for name, ms in rows:
+        print(f"  {name:<42} {ms:10.3f} ms")
+
+    legacy_bytes = sum(len(p) + 4 for p in legacy)  # '"…", ' per entry in JSON
+    print(f"  {'JSON size (list of strings)':<42} {legacy_bytes / 1024:10.1f} KiB")
+    print(f"  {'JSON size (ParticipantSet.encode)':<42} {len(plain.encode()) / 1024:10.1f} KiB")
+    print(f"  {'JSON size (weighted encode)':<42} {len(weighted.encode()) / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
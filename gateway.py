@@ -0,0 +1,34 @@
+# gateway.py — intents and cache settings for the bot client
+import os
+
+import discord
+
+LEAN_GATEWAY = os.getenv("LEAN_GATEWAY", "0") == "1"
+MESSAGE_CACHE = int(os.getenv("MESSAGE_CACHE", "0"))  # lean mode only; 0 = no message cache
+
+
+def lean_intents() -> discord.Intents:
+    # everything the cogs read comes from interaction payloads (members with roles and
+    # permissions), the guild's role/channel cache and MESSAGE_CREATE in ticket channels
+    intents = discord.Intents.none()
+    intents.guilds = True  # channels, categories, roles, overwrites
+    intents.guild_messages = True  # ticket activity index
+    intents.message_content = True  # ticket transcripts read message text from history
+    return intents
+
+
+def client_options(lean: bool = LEAN_GATEWAY) -> dict:
+    """Keyword arguments for ``commands.Bot``.
+
+    Lean mode keeps no member cache, never chunks guilds and (by default) keeps
+    no message cache; members are only known through the interactions that
+    carry them, which is all the giveaway/ticket/utility cogs use.
+    """
+    if not lean:
+        return {"intents": discord.Intents.all()}
+    return {
+        "intents": lean_intents(),
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+        "max_messages": MESSAGE_CACHE or None,
+    }
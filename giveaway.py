@@ -3,32 +3,289 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 import asyncio
-import json
+import heapq
 import os
 import time
 from datetime import datetime
-import random
 import re
+import weakref
+
+import storage
+import throttle
+from outbox import outbox, mention_summary, EMBED_DESCRIPTION_LIMIT
+from participants import ParticipantSet
 
 GIVEAWAYS_FILE = "giveaways.json"
 EMBED_COLOR = discord.Color.from_str("#CC0000")
-CHECK_INTERVAL = 15  # seconds
-
-def load_giveaways():
-    if not os.path.exists(GIVEAWAYS_FILE):
-        return {}
-    try:
-        with open(GIVEAWAYS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-def save_giveaways(data):
-    try:
-        with open(GIVEAWAYS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-    except Exception:
-        pass
+FLUSH_INTERVAL = float(os.getenv("GIVEAWAY_FLUSH_INTERVAL", "2"))  # seconds
+FLUSH_BATCH = int(os.getenv("GIVEAWAY_FLUSH_BATCH", "200"))  # changes
+EMBED_UPDATE_WINDOW = float(os.getenv("GIVEAWAY_EMBED_WINDOW", "2"))  # seconds between count edits
+RECOVERY_BATCH = int(os.getenv("GIVEAWAY_RECOVERY_BATCH", "50"))  # overdue giveaways per startup batch
+
+
+def parse_bonus_roles(value: str) -> dict:
+    # "role_id:weight,role_id:weight"; malformed entries are skipped, not fatal to the cog
+    roles = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        role_id, _, weight = item.partition(":")
+        try:
+            role_id, weight = int(role_id), int(weight)
+            if weight < 1:
+                raise ValueError
+        except ValueError:
+            print(f"⚠️ GIVEAWAY_BONUS_ROLES: pomijam błędny wpis {item!r} (oczekiwano role_id:waga, waga >= 1).")
+            continue
+        roles[role_id] = weight
+    return roles
+
+
+# bonus entries: the highest matching weight wins
+BONUS_ROLES = parse_bonus_roles(os.getenv("GIVEAWAY_BONUS_ROLES", ""))
+BOOSTER_WEIGHT = int(os.getenv("GIVEAWAY_BOOSTER_WEIGHT", "2"))
+ARCHIVE_DIR = "giveaway_archive"
+ARCHIVE_AFTER = float(os.getenv("GIVEAWAY_ARCHIVE_DAYS", "7")) * 86400  # ended giveaways stay hot this long
+ARCHIVE_INTERVAL = 3600  # seconds
+
+# ---------------- in-memory store (write-behind) ----------------
+class GiveawayStore:
+    """Owns giveaway state in memory and flushes it to disk in the background.
+
+    Mutations queue an op (create/join/finish/reroll); a background task hands the
+    batch to the storage backend once ``flush_interval`` seconds have passed or
+    ``flush_batch`` ops piled up.
+    """
+
+    def __init__(self, backend, archive, flush_interval: float = FLUSH_INTERVAL, flush_batch: int = FLUSH_BATCH):
+        self.backend = backend
+        self.archive = archive
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.data = {}
+        self.live = set()  # message ids of giveaways that have not ended yet
+        self._locks = weakref.WeakValueDictionary()  # message_id -> asyncio.Lock, freed when unused
+        self._ops = []
+        self._pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self.flush_error = None  # last write error, cleared by the next successful flush
+        self.last_flush = None
+
+    async def load(self):
+        self.data = await asyncio.to_thread(self.backend.load)
+        await asyncio.to_thread(self.archive.load_index)
+        for g in self.data.values():
+            g["participants"] = ParticipantSet.coerce(g.get("participants"))
+            g["winners"] = [int(w) for w in g.get("winners", [])]
+        self.live = {mid for mid, g in self.data.items() if not g.get("ended")}
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    @property
+    def healthy(self) -> bool:
+        # flush loop alive and the last write (if any) went through
+        return self._task is not None and not self._task.done() and self.flush_error is None
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    # ---- access ----
+    def get(self, message_id):
+        return self.data.get(str(message_id))
+
+    def items(self):
+        return self.data.items()
+
+    def lock(self, message_id) -> asyncio.Lock:
+        # one lock per giveaway: mutations of the same giveaway are serialized,
+        # different giveaways never wait on each other
+        mid = str(message_id)
+        lock = self._locks.get(mid)
+        if lock is None:
+            lock = self._locks[mid] = asyncio.Lock()
+        return lock
+
+    async def get_or_restore(self, message_id):
+        # hot set first; ended giveaways moved to cold storage are pulled back on demand
+        g = self.get(message_id)
+        if g is not None or message_id not in self.archive:
+            return g
+        record = await asyncio.to_thread(self.archive.read, message_id)
+        if record is not None and self.get(message_id) is None:
+            self.create(record)
+        return self.get(message_id)
+
+    def live_items(self):
+        return ((mid, self.data[mid]) for mid in self.live)
+
+    def create(self, g: dict):
+        mid = str(g["message_id"])
+        g["participants"] = ParticipantSet.coerce(g.get("participants"))
+        self.data[mid] = g
+        if not g.get("ended"):
+            self.live.add(mid)
+        self._queue(("create", self._encode(g)))
+
+    def add_participant(self, message_id, user_id, weight: int = 1) -> bool:
+        g = self.get(message_id)
+        uid = int(user_id)
+        if not g or g.get("ended") or not g["participants"].add(uid, weight):
+            return False
+        self._queue(("join", str(message_id), uid) if weight == 1 else ("join", str(message_id), uid, weight))
+        return True
+
+    def finish(self, message_id, winners: list):
+        g = self.get(message_id)
+        g["winners"] = winners
+        g["ended"] = True
+        self.live.discard(str(message_id))
+        self._queue(("finish", str(message_id), list(winners)))
+
+    def set_winners(self, message_id, winners: list):
+        g = self.get(message_id)
+        g["winners"] = winners
+        self._queue(("reroll", str(message_id), list(winners)))
+
+    def _queue(self, op):
+        self._ops.append(op)
+        self._pending.set()
+        if len(self._ops) >= self.flush_batch:
+            self._batch_full.set()
+
+    async def archive_ended(self, older_than: float) -> int:
+        """Move giveaways that ended more than ``older_than`` seconds ago to cold storage."""
+        cutoff = time.time() - older_than
+        records = {
+            mid: self._encode(g) for mid, g in self.data.items()
+            if g.get("ended") and int(g.get("end_time", 0)) <= cutoff
+        }
+        if not records:
+            return 0
+        # archive first, drop from the hot set only once the shard write is durable
+        await asyncio.to_thread(self.archive.write, list(records.values()))
+        moved = 0
+        for mid, record in records.items():
+            g = self.data.get(mid)
+            if g is None or g.get("winners") != record["winners"]:
+                continue  # rerolled meanwhile; stays hot and is archived next round
+            del self.data[mid]
+            self._queue(("archive", mid))
+            moved += 1
+        return moved
+
+    # ---- persistence ----
+    @staticmethod
+    def _encode(g):
+        # encode/copy the mutable parts so the writer thread never sees them change mid-dump
+        return {**g, "participants": g["participants"].encode(), "winners": list(g.get("winners", []))}
+
+    def _snapshot(self):
+        return {mid: self._encode(g) for mid, g in self.data.items()}
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._ops:
+                return
+            ops = self._ops
+            self._ops = []
+            self._pending.clear()
+            self._batch_full.clear()
+            snapshot = self._snapshot() if self.backend.wants_snapshot else None
+            try:
+                await asyncio.to_thread(self.backend.write, ops, snapshot)
+            except Exception as e:
+                print(f"❌ Błąd zapisu giveawayów: {e}")
+                self.flush_error = str(e)
+                self._ops[:0] = ops
+                self._pending.set()
+            else:
+                self.flush_error = None
+                self.last_flush = time.time()
+
+    async def _flush_loop(self):
+        while True:
+            await self._pending.wait()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+
+store = GiveawayStore(storage.giveaway_backend(GIVEAWAYS_FILE), storage.GiveawayArchive(ARCHIVE_DIR))
+
+
+# ---------------- deadline scheduler ----------------
+class DeadlineScheduler:
+    """Min-heap of (end_time, message_id) that sleeps exactly until the next deadline.
+
+    ``on_due`` receives every message id whose deadline has passed. Nothing runs
+    while the heap is empty; ``schedule``/``cancel`` re-arm the sleeper.
+    """
+
+    def __init__(self, on_due):
+        self.on_due = on_due
+        self._heap = []
+        self._deadlines = {}  # message_id -> end_time, the source of truth for heap entries
+        self._wake = asyncio.Event()
+        self._running = set()
+
+    def schedule(self, message_id, end_time: float):
+        mid = str(message_id)
+        self._deadlines[mid] = end_time
+        heapq.heappush(self._heap, (end_time, mid))
+        if self._heap[0][1] == mid:
+            self._wake.set()
+
+    def cancel(self, message_id):
+        mid = str(message_id)
+        if self._deadlines.pop(mid, None) is None:
+            return
+        # the heap entry goes stale and is skipped by run() when it comes due
+        self._wake.set()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    async def run(self):
+        while True:
+            self._wake.clear()
+            if not self._heap:
+                await self._wake.wait()
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            now = time.time()
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                end_time, mid = heapq.heappop(self._heap)
+                if self._deadlines.get(mid) == end_time:
+                    del self._deadlines[mid]
+                    due.append(mid)
+            if due:
+                # run the batch in its own task so a slow finish never delays the next deadline
+                task = asyncio.create_task(self._fire(due))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _fire(self, due):
+        try:
+            await self.on_due(due)
+        except Exception as e:
+            print(f"❌ Błąd kończenia giveawayów {due}: {e}")
 
 def parse_duration(s: str):
     if not s:
@@ -47,6 +304,82 @@ def parse_duration(s: str):
         return val * 86400
     return None
 
+def build_giveaway_embed(g: dict) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"🎉 {g['title']}",
+        description=(
+            f"{g['description']}\n\n"
+            f"🎁 **Nagroda:** {g['reward']}\n"
+            f"🎉 **Liczba wygranych:** {g['winners_count']}\n"
+            f"📊 **Uczestnicy:** {len(g['participants'])}\n"
+            f"🕒 **Koniec:** <t:{int(g['end_time'])}:R>\n"
+        ),
+        color=EMBED_COLOR
+    )
+    embed.set_footer(text="Kliknij przycisk poniżej, aby wziąć udział!")
+    return embed
+
+
+# ---------------- coalesced embed updates ----------------
+class EmbedUpdater:
+    """At most one participant-count edit per message every ``window`` seconds.
+
+    Requests arriving while an edit is pending are folded into it; the edit
+    renders whatever the store holds at that moment, so the count is always current.
+    """
+
+    def __init__(self, window: float = EMBED_UPDATE_WINDOW):
+        self.window = window
+        self._pending = {}  # message_id -> task
+        self._last_edit = {}  # message_id -> monotonic time of last edit
+
+    def request(self, channel, message_id):
+        mid = str(message_id)
+        if mid in self._pending or channel is None:
+            return
+        self._pending[mid] = asyncio.create_task(self._edit_later(channel, mid))
+
+    def discard(self, message_id):
+        mid = str(message_id)
+        task = self._pending.pop(mid, None)
+        if task:
+            task.cancel()
+        self._last_edit.pop(mid, None)
+
+    async def _edit_later(self, channel, mid: str):
+        delay = self._last_edit.get(mid, 0) + self.window - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # joins landing while this edit is in flight schedule the next one
+        self._pending.pop(mid, None)
+        g = store.get(mid)
+        if not g or g.get("ended"):
+            return
+        self._last_edit[mid] = time.monotonic()
+        try:
+            # queued behind nothing urgent: interaction responses go first
+            await (await outbox.edit(channel.get_partial_message(int(mid)), embed=build_giveaway_embed(g)))
+        except Exception:
+            pass
+
+
+embed_updates = EmbedUpdater()
+
+def winners_description(winners) -> str:
+    # embed descriptions cap at 4096 characters; big draws list the rest in the announcement
+    head, tail = "🎉 **Zwycięzcy:** ", "\n\nDziękujemy wszystkim za udział!"
+    return head + mention_summary(winners, EMBED_DESCRIPTION_LIMIT - len(head) - len(tail)) + tail
+
+def entry_weight(member) -> int:
+    # number of entries a member gets in the draw
+    weight = 1
+    if getattr(member, "premium_since", None):
+        weight = max(weight, BOOSTER_WEIGHT)
+    for role in getattr(member, "roles", ()):
+        weight = max(weight, BONUS_ROLES.get(role.id, 1))
+    return weight
+
+
 # ---------------- persistent view (static custom_id) ----------------
 class GiveawayView(discord.ui.View):
     def __init__(self):
@@ -57,48 +390,82 @@ class GiveawayView(discord.ui.View):
         self.add_item(btn)
 
     async def _on_join(self, interaction: discord.Interaction):
+        if await throttle.giveaway_join.reject(interaction):
+            return
         # use interaction.message.id to identify which giveaway
         msg = interaction.message
         if not msg:
             await interaction.response.send_message("⚠️ Błąd — nie znaleziono wiadomości.", ephemeral=True)
             return
-        mid = str(msg.id)
-        data = load_giveaways()
-        g = data.get(mid)
+        g = store.get(msg.id)
         if not g or g.get("ended"):
             await interaction.response.send_message("⚠️ Ten giveaway już się zakończył.", ephemeral=True)
             return
 
-        uid = str(interaction.user.id)
-        if uid in g["participants"]:
+        async with store.lock(msg.id):
+            joined = store.add_participant(msg.id, interaction.user.id, entry_weight(interaction.user))
+        if not joined:
+            if g.get("ended"):
+                # a finish won the race while we waited for the lock
+                await interaction.response.send_message("⚠️ Ten giveaway już się zakończył.", ephemeral=True)
+                return
             await interaction.response.send_message("❌ Już bierzesz udział w tym giveawayu!", ephemeral=True)
             return
 
-        g["participants"].append(uid)
-        save_giveaways(data)
-
-        # update embed participants count
-        try:
-            embed = msg.embeds[0]
-            desc_lines = embed.description.split("\n")
-            for i, line in enumerate(desc_lines):
-                if line.startswith("📊"):
-                    desc_lines[i] = f"📊 **Uczestnicy:** {len(g['participants'])}"
-            embed.description = "\n".join(desc_lines)
-            await msg.edit(embed=embed, view=self)
-        except Exception:
-            pass
-
         await interaction.response.send_message("✅ Dołączyłeś do giveawayu!", ephemeral=True)
 
+        # participants count is refreshed by the coalescer, not per click
+        embed_updates.request(interaction.channel, msg.id)
+
 
 class GiveawayCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.check_loop.start()
-
-    def cog_unload(self):
-        self.check_loop.cancel()
+        self.store = store
+        self.scheduler = DeadlineScheduler(self._finish_due)
+        self._scheduler_task = None
+        self._overdue = []
+        self._recovery = None
+        self._announcing = set()  # background tasks queuing finish announcements
+
+    async def cog_load(self):
+        await store.load()
+        store.start()
+        # deadlines that passed while the bot was offline are left to recover()
+        now_ts = time.time()
+        for mid, g in store.live_items():
+            end_ts = int(g.get("end_time", 0))
+            if end_ts <= now_ts:
+                self._overdue.append(mid)
+            else:
+                self.scheduler.schedule(mid, end_ts)
+        self._scheduler_task = asyncio.create_task(self._run_scheduler())
+        self.archive_loop.start()
+
+    def recover(self):
+        # one shared task, so main.on_ready and the scheduler can both await it safely
+        if self._recovery is None:
+            self._recovery = asyncio.create_task(self._recover_overdue())
+        return self._recovery
+
+    async def _recover_overdue(self):
+        started = time.perf_counter()
+        overdue, self._overdue = self._overdue, []
+        finished = 0
+        # fixed-size batches: one store flush each; announcements drain through the outbox
+        # afterwards, so this measures draw + persist, not Discord's pacing
+        for i in range(0, len(overdue), RECOVERY_BATCH):
+            finished += len(await self._finish_due(overdue[i:i + RECOVERY_BATCH]))
+        elapsed = time.perf_counter() - started
+        print(f"♻️ Zakończono {finished} zaległych giveawayów po przestoju w {elapsed:.2f}s "
+              f"(ogłoszenia w kolejce: {len(self._announcing)}).")
+        return finished, elapsed
+
+    async def cog_unload(self):
+        if self._scheduler_task:
+            self._scheduler_task.cancel()
+        self.archive_loop.cancel()
+        await store.stop()
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -148,28 +515,10 @@ class GiveawayCog(commands.Cog):
 
             end_ts = int(time.time()) + seconds
 
-            embed = discord.Embed(
-                title=f"🎉 {self.title_input.value}",
-                description=(
-                    f"{self.desc_input.value}\n\n"
-                    f"🎁 **Nagroda:** {self.reward_input.value}\n"
-                    f"🎉 **Liczba wygranych:** {winners_count}\n"
-                    f"📊 **Uczestnicy:** 0\n"
-                    f"🕒 **Koniec:** <t:{end_ts}:R>\n"
-                ),
-                color=EMBED_COLOR
-            )
-            embed.set_footer(text="Kliknij przycisk poniżej, aby wziąć udział!")
-
-            view = GiveawayView()  # static button custom_id
-            msg = await interaction.channel.send(embed=embed, view=view)
-
-            # save to file
-            data = load_giveaways()
-            data[str(msg.id)] = {
+            g = {
                 "guild_id": interaction.guild_id,
                 "channel_id": interaction.channel_id,
-                "message_id": msg.id,
+                "message_id": None,
                 "title": self.title_input.value,
                 "description": self.desc_input.value,
                 "reward": self.reward_input.value,
@@ -179,7 +528,13 @@ class GiveawayCog(commands.Cog):
                 "winners": [],
                 "ended": False
             }
-            save_giveaways(data)
+
+            view = GiveawayView()  # static button custom_id
+            msg = await interaction.channel.send(embed=build_giveaway_embed(g), view=view)
+
+            g["message_id"] = msg.id
+            store.create(g)
+            self.parent.scheduler.schedule(msg.id, end_ts)
 
             await interaction.response.send_message("✅ Giveaway został utworzony i zapisany!", ephemeral=True)
 
@@ -195,119 +550,148 @@ class GiveawayCog(commands.Cog):
         if not (interaction.user.guild_permissions.administrator or interaction.user.id == interaction.guild.owner_id):
             await interaction.response.send_message("⛔ Brak uprawnień.", ephemeral=True)
             return
-        data = load_giveaways()
-        g = data.get(str(message_id))
+        g = store.get(message_id)
+        if not g and message_id in store.archive:
+            await interaction.response.send_message("⚠️ Ten giveaway już został zakończony.", ephemeral=True)
+            return
         if not g:
             await interaction.response.send_message("❌ Nie znaleziono giveawayu o takim ID.", ephemeral=True)
             return
         if g.get("ended"):
             await interaction.response.send_message("⚠️ Ten giveaway już został zakończony.", ephemeral=True)
             return
-        await self._finish_giveaway(int(message_id))
+        self.scheduler.cancel(message_id)
+        if not await self._finish_giveaway(int(message_id)):
+            await interaction.response.send_message("⚠️ Ten giveaway już został zakończony.", ephemeral=True)
+            return
         await interaction.response.send_message("✅ Giveaway zakończony manualnie.", ephemeral=True)
 
     @app_commands.command(name="reroll", description="🔁 Wylosuj nowego zwycięzcę (admin).")
-    @app_commands.describe(message_id="ID wiadomości giveaway")
-    async def reroll(self, interaction: discord.Interaction, message_id: str):
+    @app_commands.describe(
+        message_id="ID wiadomości giveaway",
+        winners="Wzmianki/ID zwycięzców do zamiany (domyślnie pierwszy)",
+        count="Ilu pierwszych zwycięzców wylosować ponownie, gdy nie podano 'winners'"
+    )
+    async def reroll(self, interaction: discord.Interaction, message_id: str, winners: str = None, count: int = 1):
         if not (interaction.user.guild_permissions.administrator or interaction.user.id == interaction.guild.owner_id):
             await interaction.response.send_message("⛔ Brak uprawnień.", ephemeral=True)
             return
-        data = load_giveaways()
-        g = data.get(str(message_id))
-        if not g:
-            await interaction.response.send_message("❌ Nie znaleziono giveawayu o takim ID.", ephemeral=True)
-            return
-        if not g.get("winners"):
-            await interaction.response.send_message("⚠️ Najpierw musi być wylosowany zwycięzca.", ephemeral=True)
-            return
-        participants = g.get("participants", [])
-        previous = g.get("winners", [])
-        possible = [p for p in participants if p not in previous]
-        if not possible:
-            await interaction.response.send_message("⚠️ Brak uczestników do rerollu.", ephemeral=True)
-            return
-        new = random.choice(possible)
-        replaced = previous[0] if previous else None
-        if replaced:
-            g["winners"].remove(replaced)
-        g["winners"].append(new)
-        save_giveaways(data)
-        try:
-            guild = self.bot.get_guild(g["guild_id"])
-            channel = guild.get_channel(g["channel_id"])
-            msg = await channel.fetch_message(g["message_id"])
-            mention_list = ", ".join(f"<@{int(x)}>" for x in g["winners"])
-            embed = discord.Embed(
-                title="🏆 Giveaway - reroll!",
-                description=f"🎉 **Zwycięzcy:** {mention_list}\n\nDziękujemy wszystkim za udział!",
-                color=discord.Color.dark_gray()
-            )
-            await msg.edit(embed=embed, view=None)
-            await channel.send(f"🔁 Nowy zwycięzca: <@{int(new)}> (zamiast <@{int(replaced)}>).")
-        except Exception:
-            pass
+        async with store.lock(message_id):
+            g = await store.get_or_restore(message_id)
+            if not g:
+                await interaction.response.send_message("❌ Nie znaleziono giveawayu o takim ID.", ephemeral=True)
+                return
+            if not g.get("winners"):
+                await interaction.response.send_message("⚠️ Najpierw musi być wylosowany zwycięzca.", ephemeral=True)
+                return
+            previous = g.get("winners", [])
+            if winners:
+                targets = list(dict.fromkeys(int(x) for x in re.findall(r"\d{15,20}", winners) if int(x) in previous))
+                if not targets:
+                    await interaction.response.send_message("❌ Żaden z podanych użytkowników nie jest zwycięzcą.", ephemeral=True)
+                    return
+            else:
+                targets = previous[:max(1, count)]
+            fresh = g["participants"].draw(len(targets), exclude=previous)
+            if not fresh:
+                await interaction.response.send_message("⚠️ Brak uczestników do rerollu.", ephemeral=True)
+                return
+            # replace in place; if the pool ran short only the first len(fresh) targets change
+            swap = dict(zip(targets, fresh))
+            store.set_winners(message_id, [swap.get(w, w) for w in previous])
+        # acknowledge first; the edit and announcement are queued behind it
         await interaction.response.send_message("✅ Reroll zakończony.", ephemeral=True)
-
-    # ---- background checker ----
-    @tasks.loop(seconds=CHECK_INTERVAL)
-    async def check_loop(self):
-        data = load_giveaways()
-        now_ts = int(time.time())
-        to_finish = []
-        for mid, g in data.items():
-            if g.get("ended"):
-                continue
-            if int(g.get("end_time", 0)) <= now_ts:
-                to_finish.append(int(mid))
-        for mid in to_finish:
-            await self._finish_giveaway(mid)
-
-    @check_loop.before_loop
-    async def before_check(self):
+        channel = self.bot.get_channel(g["channel_id"])
+        if channel is None:
+            return
+        embed = discord.Embed(
+            title="🏆 Giveaway - reroll!",
+            description=winners_description(g["winners"]),
+            color=discord.Color.dark_gray()
+        )
+        await outbox.edit(channel.get_partial_message(g["message_id"]), embed=embed, view=None)
+        replaced = mention_summary(swap, 1000)
+        await outbox.announce(channel, list(swap.values()), prefix="🔁 Nowi zwycięzcy: ", suffix=f" (zamiast {replaced}).")
+
+    # ---- hot/cold tiering ----
+    @tasks.loop(seconds=ARCHIVE_INTERVAL)
+    async def archive_loop(self):
+        moved = await store.archive_ended(ARCHIVE_AFTER)
+        if moved:
+            print(f"🗄️ Przeniesiono {moved} zakończonych giveawayów do archiwum.")
+
+    # ---- deadline scheduler ----
+    async def _run_scheduler(self):
         await self.bot.wait_until_ready()
+        await self.recover()
+        await self.scheduler.run()
+
+    async def _finish_due(self, message_ids):
+        # 1) draw every due giveaway and persist the results as one batch
+        finished = []
+        for mid in message_ids:
+            async with store.lock(mid):
+                g = store.get(mid)
+                if not g or g.get("ended"):
+                    continue
+                winners = g["participants"].draw(int(g.get("winners_count", 1)))
+                store.finish(mid, winners)
+                embed_updates.discard(mid)
+                finished.append(g)
+        if not finished:
+            return []
+        await store.flush()
+
+        # 2) hand edits + announcements to the outbox in the background: state is final
+        # once flushed, so callers (recovery, scheduler, /giveawayend) never wait on REST
+        # pacing or a full channel queue, and nothing holds the giveaway lock meanwhile
+        task = asyncio.create_task(self._announce_all(finished))
+        self._announcing.add(task)
+        task.add_done_callback(self._announcing.discard)
+        return finished
+
+    async def _announce_all(self, finished):
+        async def announce(g):
+            try:
+                await self._announce_finish(g)
+            except Exception as e:
+                print(f"❌ Błąd ogłaszania giveawayu {g['message_id']}: {e}")
+
+        await asyncio.gather(*(announce(g) for g in finished))
 
     # ---- finalize ----
     async def _finish_giveaway(self, message_id: int):
-        data = load_giveaways()
-        g = data.get(str(message_id))
-        if not g or g.get("ended"):
-            return
-        participants = g.get("participants", [])
-        winners_count = int(g.get("winners_count", 1))
-        winners = []
-        if participants:
-            winners = random.sample(participants, min(len(participants), winners_count))
-        g["winners"] = winners
-        g["ended"] = True
-        save_giveaways(data)
+        # returns False if the giveaway was already finished (e.g. scheduler vs /giveawayend)
+        return bool(await self._finish_due([str(message_id)]))
 
-        try:
-            guild = self.bot.get_guild(g["guild_id"])
-            if not guild:
-                return
-            channel = guild.get_channel(g["channel_id"])
-            if not channel:
-                return
-            message = await channel.fetch_message(g["message_id"])
-            if winners:
-                mentions = ", ".join(f"<@{int(w)}>" for w in winners)
-                embed = discord.Embed(
-                    title="🏆 Giveaway zakończony!",
-                    description=f"🎉 **Zwycięzcy:** {mentions}\n\nDziękujemy wszystkim za udział!",
-                    color=discord.Color.dark_gray()
-                )
-                await message.edit(embed=embed, view=None)
-                await channel.send(f"🎉 Gratulacje dla: {mentions}! Wygrałeś(a) **{g.get('reward','nagroda')}** 🎊")
-            else:
-                embed = discord.Embed(
-                    title="🏆 Giveaway zakończony!",
-                    description="😢 Giveaway zakończony — nikt nie wziął udziału.",
-                    color=discord.Color.dark_gray()
-                )
-                await message.edit(embed=embed, view=None)
-                await channel.send("😢 Giveaway zakończony — nikt nie wziął udziału.")
-        except Exception:
-            pass
+    async def _announce_finish(self, g: dict):
+        channel = self.bot.get_channel(g["channel_id"])
+        if not channel:
+            return
+        # partial message: edit by ID without a fetch_message round trip
+        message = channel.get_partial_message(g["message_id"])
+        winners = g["winners"]
+        # queued per channel and paced by the outbox; long winner lists are split into <2000-char messages
+        if winners:
+            embed = discord.Embed(
+                title="🏆 Giveaway zakończony!",
+                description=winners_description(winners),
+                color=discord.Color.dark_gray()
+            )
+            await outbox.edit(message, embed=embed, view=None)
+            await outbox.announce(
+                channel, winners,
+                prefix="🎉 Gratulacje dla: ",
+                suffix=f"! Wygrałeś(a) **{g.get('reward','nagroda')}** 🎊",
+            )
+        else:
+            embed = discord.Embed(
+                title="🏆 Giveaway zakończony!",
+                description="😢 Giveaway zakończony — nikt nie wziął udziału.",
+                color=discord.Color.dark_gray()
+            )
+            await outbox.edit(message, embed=embed, view=None)
+            await outbox.send(channel, "😢 Giveaway zakończony — nikt nie wziął udziału.")
 
 # ---- setup ----
 async def setup(bot: commands.Bot):
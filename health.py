@@ -0,0 +1,87 @@
+# health.py — liveness/readiness HTTP server running inside the bot's event loop
+import os
+import time
+
+from aiohttp import web
+from discord.ext import commands
+
+import loopmonitor
+import metrics
+
+HEALTH_HOST = os.getenv("HEALTH_HOST", "0.0.0.0")
+HEALTH_PORT = int(os.getenv("HEALTH_PORT", os.getenv("PORT", "8080")))
+
+
+class HealthServer:
+    """aiohttp app served from the bot's loop: no extra thread, no Flask.
+
+    ``/healthz`` answers as long as the loop is responsive; ``/readyz`` is 200
+    only when the gateway is connected, every required extension is loaded and
+    the giveaway store is flushing without errors. ``/`` keeps the old
+    keep-alive text for uptime pingers and ``/metrics`` serves the
+    Prometheus exposition from ``metrics.py``; ``/debug/stalls`` dumps the
+    loop monitor's worst stalls when LOOP_MONITOR=1.
+    """
+
+    def __init__(self, bot: commands.Bot, extensions, host: str = HEALTH_HOST, port: int = HEALTH_PORT):
+        self.bot = bot
+        self.extensions = list(extensions)
+        self.host = host
+        self.port = port
+        self.started = time.time()
+        self.app = web.Application()
+        self.app.router.add_get("/", self.home)
+        self.app.router.add_get("/healthz", self.liveness)
+        self.app.router.add_get("/readyz", self.readiness)
+        self.app.router.add_get("/metrics", self.exposition)
+        self.app.router.add_get("/debug/stalls", self.stalls)
+        self._runner = None
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"🌐 Serwer health na porcie {self.port}.")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ---- checks ----
+    def checks(self) -> dict:
+        bot = self.bot
+        gateway = bot.is_ready() and not bot.is_closed() and bot.latency == bot.latency  # latency is NaN before the first heartbeat
+        missing = [ext for ext in self.extensions if ext not in bot.extensions]
+        cog = bot.get_cog("GiveawayCog")
+        store = cog.store if cog else None
+        return {
+            "gateway": gateway,
+            "extensions": not missing,
+            "missing_extensions": missing,
+            "store": bool(store and store.healthy),
+            "store_error": store.flush_error if store else "giveaway cog not loaded",
+            "store_last_flush": store.last_flush if store else None,
+        }
+
+    # ---- routes ----
+    async def home(self, request: web.Request):
+        return web.Response(text="VictorRepsBot is running!")
+
+    async def liveness(self, request: web.Request):
+        return web.json_response({"status": "ok", "uptime": round(time.time() - self.started, 1)})
+
+    async def readiness(self, request: web.Request):
+        checks = self.checks()
+        ready = checks["gateway"] and checks["extensions"] and checks["store"]
+        checks["status"] = "ready" if ready else "not ready"
+        checks["latency"] = round(self.bot.latency, 4) if checks["gateway"] else None
+        return web.json_response(checks, status=200 if ready else 503)
+
+    async def exposition(self, request: web.Request):
+        return web.Response(text=metrics.render(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def stalls(self, request: web.Request):
+        if not loopmonitor.monitor.running:
+            return web.json_response({"error": "LOOP_MONITOR is off"}, status=404)
+        return web.json_response(loopmonitor.monitor.dump())
@@ -0,0 +1,541 @@
+# loadtest.py — local stand-in for Discord's REST API and gateway, plus an end-to-end load test
+# usage: python loadtest.py [giveaway users] [tickets] [concurrency] [giveaway winners]
+# The bot runs in-process with the real giveaway/ticketpanel cogs; discord.py is pointed at
+# FakeDiscord, which serves REST on /api/v10 and the gateway on /gateway, applies per-route
+# rate limits like Discord and records every call. State files go to a temporary directory.
+import asyncio
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+# measure throughput, not the per-guild throttles (override by exporting these)
+for _action in ("GIVEAWAY_JOIN", "TICKET_BUTTON", "TICKET_MODAL"):
+    os.environ.setdefault(f"THROTTLE_{_action}_GUILD", "0")
+os.environ.setdefault("TICKET_IDLE_WARN_HOURS", "0")
+
+import discord
+import yarl
+from aiohttp import web, WSMsgType
+from discord.ext import commands
+from discord.gateway import DiscordWebSocket
+
+import gateway
+import throttle
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))  # cogs resolve after the chdir below
+
+API_PREFIX = "/api/v10"
+GUILD_ID = 900_000_000_000_000_001
+APP_ID = 900_000_000_000_000_002
+OWNER_ID = 900_000_000_000_000_003
+STAFF_ROLE_ID = 900_000_000_000_000_004
+CHANNEL_ID = 900_000_000_000_000_005
+FIRST_USER_ID = 800_000_000_000_000_000
+# (requests, per seconds) per bucket; Discord's real limits for these routes are similar
+RATE_LIMITS = {
+    "POST /channels/{channel_id}/messages": (5, 5.0),
+    "PATCH /channels/{channel_id}/messages/{message_id}": (5, 5.0),
+    "DELETE /channels/{channel_id}": (5, 5.0),
+    "POST /guilds/{guild_id}/channels": (50, 10.0),
+}
+DEFAULT_RATE_LIMIT = (50, 1.0)
+OP_TIMEOUT = 120  # seconds before a single simulated operation counts as failed
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def user_payload(uid: int, bot: bool = False) -> dict:
+    return {"id": str(uid), "username": f"user{uid}", "discriminator": "0", "global_name": None, "avatar": None, "bot": bot}
+
+
+class FakeDiscord:
+    """Minimal Discord: enough REST and gateway for the giveaway and ticket cogs.
+
+    Channels and messages live in dicts; REST calls that change channels are
+    echoed to the gateway as CHANNEL_CREATE/DELETE like the real API. Each
+    interaction the harness injects gets a future that resolves on the bot's
+    first callback, so latency is measured at the server, as Discord sees it.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._ids = itertools.count((int(time.time() * 1000) - 1420070400000) << 22)
+        self.bot_user = user_payload(APP_ID, bot=True)
+        self.channels = {}  # id -> channel payload
+        self.messages = defaultdict(dict)  # channel id -> {message id: payload}
+        self.requests = Counter()  # "METHOD /route/{template}" -> calls
+        self.rate_limited = Counter()  # route -> 429s sent
+        self.deleted = {}  # channel id -> monotonic time of DELETE
+        self.close_buttons = {}  # ticket channel id -> message payload carrying its close button
+        self.ready_at = {}  # ticket channel id -> monotonic time its close button was posted
+        self.channel_owner = {}  # member id -> ticket channel id, from the member overwrite
+        self.callbacks = {}  # interaction token -> future of the callback body
+        self.followups = {}  # interaction token -> future of the first followup
+        self._buckets = {}  # (route, major id) -> [window start, used]
+        self._ws = None
+        self._seq = 0
+        self.connected = asyncio.Event()
+        self._runner = None
+        self.channels[CHANNEL_ID] = self._channel(CHANNEL_ID, "giveaway", 0)
+
+    # ---- server ----
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/gateway", self.gateway)
+        app.router.add_route("*", API_PREFIX + "/{tail:.*}", self.rest)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    # ---- gateway ----
+    async def gateway(self, request: web.Request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self._ws = ws
+        await ws.send_json({"op": 10, "d": {"heartbeat_interval": 41250}})
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                break
+            payload = json.loads(msg.data)
+            if payload["op"] == 1:
+                await ws.send_json({"op": 11})
+            elif payload["op"] == 2:
+                await self.dispatch("READY", {
+                    "v": 10, "user": self.bot_user, "guilds": [{"id": str(GUILD_ID), "unavailable": True}],
+                    "session_id": "loadtest", "resume_gateway_url": f"ws://{self.host}:{self.port}/gateway",
+                    "application": {"id": str(APP_ID), "flags": 0},
+                })
+                await self.dispatch("GUILD_CREATE", self._guild())
+                self.connected.set()
+        return ws
+
+    async def dispatch(self, event: str, data: dict):
+        self._seq += 1
+        await self._ws.send_str(json.dumps({"op": 0, "t": event, "s": self._seq, "d": data}))
+
+    def _guild(self) -> dict:
+        roles = [
+            {"id": str(GUILD_ID), "name": "@everyone", "permissions": str(discord.Permissions.general().value),
+             "position": 0, "color": 0, "hoist": False, "managed": False, "mentionable": False},
+            {"id": str(STAFF_ROLE_ID), "name": "Staff", "permissions": str(discord.Permissions(manage_messages=True).value),
+             "position": 1, "color": 0, "hoist": False, "managed": False, "mentionable": False},
+        ]
+        return {
+            "id": str(GUILD_ID), "name": "loadtest", "owner_id": str(OWNER_ID), "roles": roles,
+            "channels": list(self.channels.values()), "members": [{"user": self.bot_user, "roles": [], "joined_at": None, "flags": 0}],
+            "member_count": 100_000, "large": True, "emojis": [], "stickers": [], "features": [], "presences": [],
+            "threads": [], "voice_states": [],
+        }
+
+    def _channel(self, cid: int, name: str, kind: int, parent_id=None, overwrites=(), position: int = 0) -> dict:
+        return {"id": str(cid), "type": kind, "name": name, "guild_id": str(GUILD_ID), "position": position,
+                "parent_id": str(parent_id) if parent_id else None, "permission_overwrites": list(overwrites)}
+
+    # ---- interactions ----
+    def member(self, uid: int) -> dict:
+        return {"user": user_payload(uid), "roles": [], "joined_at": "2024-01-01T00:00:00+00:00",
+                "permissions": str(discord.Permissions.general().value), "deaf": False, "mute": False, "flags": 0}
+
+    async def interact(self, uid: int, kind: int, data: dict, channel_id: int, message: dict = None):
+        """Send INTERACTION_CREATE; returns (token, sent_at, callback future)."""
+        iid = self.next_id()
+        token = f"token{iid}"
+        loop = asyncio.get_running_loop()
+        self.callbacks[token] = loop.create_future()
+        self.followups[token] = loop.create_future()
+        payload = {
+            "id": str(iid), "application_id": str(APP_ID), "type": kind, "token": token, "version": 1,
+            "data": data, "guild_id": str(GUILD_ID), "channel_id": str(channel_id),
+            "channel": {"id": str(channel_id), "type": 0, "guild_id": str(GUILD_ID)},
+            "member": self.member(uid), "app_permissions": str(discord.Permissions.all().value),
+            "locale": "pl", "guild_locale": "pl", "entitlements": [], "authorizing_integration_owners": {},
+            "context": 0, "attachment_size_limit": 8 * 1024 * 1024,
+        }
+        if message is not None:
+            payload["message"] = message
+        sent = time.monotonic()
+        await self.dispatch("INTERACTION_CREATE", payload)
+        return token, sent, self.callbacks[token]
+
+    # ---- REST ----
+    def _message(self, cid: int, body: dict, mid: int = None) -> dict:
+        mid = mid or self.next_id()
+        return {
+            "id": str(mid), "channel_id": str(cid), "guild_id": str(GUILD_ID), "author": self.bot_user,
+            "content": body.get("content") or "", "embeds": body.get("embeds") or [],
+            "components": body.get("components") or [], "attachments": [], "mentions": [], "mention_roles": [],
+            "mention_everyone": False, "pinned": False, "tts": False, "type": 0, "flags": body.get("flags") or 0,
+            "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None,
+        }
+
+    def _rate_limit(self, route: str, major: str):
+        # fixed window per (route, major parameter); returns (headers, retry_after or None)
+        limit, per = RATE_LIMITS.get(route, DEFAULT_RATE_LIMIT)
+        now = time.monotonic()
+        bucket = self._buckets.setdefault((route, major), [now, 0])
+        if now - bucket[0] >= per:
+            bucket[0], bucket[1] = now, 0
+        reset_after = per - (now - bucket[0])
+        headers = {"X-RateLimit-Limit": str(limit), "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+                   "X-RateLimit-Bucket": f"{route}:{major}"}
+        if bucket[1] >= limit:
+            headers["X-RateLimit-Remaining"] = "0"
+            return headers, reset_after
+        bucket[1] += 1
+        headers["X-RateLimit-Remaining"] = str(limit - bucket[1])
+        return headers, None
+
+    async def rest(self, request: web.Request):
+        path = "/" + request.match_info["tail"]
+        for method, pattern, template, handler in self._routes():
+            match = pattern.fullmatch(path)
+            if method == request.method and match:
+                break
+        else:
+            self.requests[f"{request.method} {path}"] += 1
+            return self._json({"message": "404: Not Found", "code": 0}, 404)
+        route = f"{method} {template}"
+        self.requests[route] += 1
+        major = next(iter(match.groupdict().values()), "")
+        headers, retry_after = self._rate_limit(route, major)
+        if retry_after is not None:
+            self.rate_limited[route] += 1
+            return self._json({"message": "You are being rate limited.", "retry_after": retry_after, "global": False},
+                              429, headers)
+        body = await request.json() if request.can_read_body else {}
+        status, data = await handler(request, body, **match.groupdict())
+        return self._json(data, status, headers)
+
+    @staticmethod
+    def _json(data, status: int = 200, headers=None):
+        # discord.py only parses bodies whose content-type is exactly application/json, and
+        # treats a 429 without Discord's "Via" header as a Cloudflare ban instead of retrying
+        headers = {**(headers or {}), "Content-Type": "application/json", "Via": "1.1 google"}
+        return web.Response(body=json.dumps(data).encode(), status=status, headers=headers)
+
+    def _routes(self):
+        ident = r"(?P<{}>[^/]+)"
+        table = [
+            ("GET", "/users/@me", self._get_me),
+            ("GET", "/oauth2/applications/@me", self._get_application),
+            ("PUT", "/applications/{app_id}/commands", self._put_commands),
+            ("POST", "/channels/{channel_id}/messages", self._post_message),
+            ("GET", "/channels/{channel_id}/messages", self._get_messages),
+            ("PATCH", "/channels/{channel_id}/messages/{message_id}", self._patch_message),
+            ("PATCH", "/channels/{channel_id}", self._patch_channel),
+            ("DELETE", "/channels/{channel_id}", self._delete_channel),
+            ("POST", "/guilds/{guild_id}/channels", self._post_channel),
+            ("POST", "/interactions/{interaction_id}/{token}/callback", self._post_callback),
+            ("POST", "/webhooks/{app_id}/{token}", self._post_followup),
+            ("PATCH", "/webhooks/{app_id}/{token}/messages/{message_id}", self._patch_followup),
+        ]
+        if not hasattr(self, "_compiled"):
+            self._compiled = [
+                (method, re.compile(re.sub(r"\{(\w+)\}", lambda m: ident.format(m[1]), template)), template, handler)
+                for method, template, handler in table
+            ]
+        return self._compiled
+
+    async def _get_me(self, request, body):
+        return 200, self.bot_user
+
+    async def _get_application(self, request, body):
+        return 200, {"id": str(APP_ID), "name": "loadtest", "description": "", "icon": None, "bot_public": True,
+                     "bot_require_code_grant": False, "owner": user_payload(OWNER_ID), "team": None,
+                     "verify_key": "0", "flags": 0, "interactions_endpoint_url": None}
+
+    async def _put_commands(self, request, body, app_id):
+        return 200, []
+
+    async def _post_message(self, request, body, channel_id):
+        cid = int(channel_id)
+        if cid not in self.channels:
+            return 404, {"message": "Unknown Channel", "code": 10003}
+        message = self._message(cid, body)
+        self.messages[cid][int(message["id"])] = message
+        for row in message["components"]:
+            for component in row.get("components", ()):
+                if str(component.get("custom_id", "")).startswith("close_ticket:"):
+                    self.close_buttons[cid] = message
+                    self.ready_at[cid] = time.monotonic()
+        return 200, message
+
+    async def _get_messages(self, request, body, channel_id):
+        messages = self.messages.get(int(channel_id), {})
+        limit = int(request.query.get("limit", 50))
+        if "after" in request.query:
+            after = int(request.query["after"])
+            ids = sorted(mid for mid in messages if mid > after)[:limit]
+        else:
+            before = int(request.query.get("before", 1 << 63))
+            ids = sorted((mid for mid in messages if mid < before), reverse=True)[:limit]
+            ids.reverse()
+        # newest first, like Discord
+        return 200, [messages[mid] for mid in reversed(ids)]
+
+    async def _patch_message(self, request, body, channel_id, message_id):
+        messages = self.messages.get(int(channel_id), {})
+        message = messages.get(int(message_id))
+        if message is None:
+            return 404, {"message": "Unknown Message", "code": 10008}
+        message.update({k: v for k, v in body.items() if k in ("content", "embeds", "components")})
+        message["edited_timestamp"] = "2024-01-01T00:00:01+00:00"
+        return 200, message
+
+    async def _patch_channel(self, request, body, channel_id):
+        channel = self.channels.get(int(channel_id))
+        if channel is None:
+            return 404, {"message": "Unknown Channel", "code": 10003}
+        channel.update({k: v for k, v in body.items() if k in ("name", "parent_id", "permission_overwrites", "position")})
+        await self.dispatch("CHANNEL_UPDATE", channel)
+        return 200, channel
+
+    async def _delete_channel(self, request, body, channel_id):
+        channel = self.channels.pop(int(channel_id), None)
+        if channel is None:
+            return 404, {"message": "Unknown Channel", "code": 10003}
+        self.messages.pop(int(channel_id), None)
+        self.deleted[int(channel_id)] = time.monotonic()
+        await self.dispatch("CHANNEL_DELETE", channel)
+        return 200, channel
+
+    async def _post_channel(self, request, body, guild_id):
+        cid = self.next_id()
+        channel = self._channel(cid, body["name"], body.get("type", 0), body.get("parent_id"),
+                                body.get("permission_overwrites", ()), body.get("position") or 0)
+        self.channels[cid] = channel
+        for overwrite in channel["permission_overwrites"]:
+            if overwrite.get("type") == 1 and int(overwrite["id"]) != APP_ID:
+                self.channel_owner[int(overwrite["id"])] = cid
+        await self.dispatch("CHANNEL_CREATE", channel)
+        return 201, channel
+
+    async def _post_callback(self, request, body, interaction_id, token):
+        future = self.callbacks.get(token)
+        if future is None or future.done():
+            return 400, {"message": "Interaction has already been acknowledged.", "code": 40060}
+        future.set_result((time.monotonic(), body))
+        return 200, {"interaction": {"id": interaction_id, "type": body.get("type")},
+                     "resource": {"type": body.get("type")}}
+
+    async def _post_followup(self, request, body, app_id, token):
+        future = self.followups.get(token)
+        if future is not None and not future.done():
+            future.set_result((time.monotonic(), body))
+        return 200, self._message(CHANNEL_ID, body)
+
+    async def _patch_followup(self, request, body, app_id, token, message_id):
+        return 200, self._message(CHANNEL_ID, body, int(message_id) if message_id.isdigit() else None)
+
+
+class LoadTest:
+    """Drives the cogs through FakeDiscord and collects per-phase numbers."""
+
+    def __init__(self, users: int, tickets: int, concurrency: int, winners: int):
+        self.users = users
+        self.tickets = tickets
+        self.concurrency = concurrency
+        self.winners = winners
+        self.fake = FakeDiscord()
+        self.results = []
+
+    async def run(self):
+        os.chdir(tempfile.mkdtemp(prefix="victorreps-loadtest-"))
+        await self.fake.start()
+        discord.http.Route.BASE = self.fake.base_url + API_PREFIX
+        DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f"ws://127.0.0.1:{self.fake.port}/gateway")
+
+        bot = commands.Bot(command_prefix="!", **gateway.client_options(lean=True))
+        async with bot:
+            for ext in ("giveaway", "ticketpanel"):
+                await bot.load_extension(ext)
+            runner = asyncio.create_task(bot.start("loadtest-token"))
+            ready = asyncio.create_task(bot.wait_until_ready())
+            await asyncio.wait((runner, ready), return_when=asyncio.FIRST_COMPLETED)
+            if runner.done():
+                ready.cancel()
+                runner.result()  # login/connect failed: raise it
+            try:
+                await self.giveaway_phase(bot)
+                await self.ticket_phase(bot)
+            finally:
+                await bot.close()
+                runner.cancel()
+        await self.fake.stop()
+        self.report()
+
+    async def _gather(self, jobs):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(job):
+            async with semaphore:
+                return await job
+
+        return await asyncio.gather(*(bounded(job) for job in jobs), return_exceptions=True)
+
+    def _phase(self, name: str, ops: int, acks, e2e, before: Counter, rate_before: Counter, elapsed: float):
+        calls = self.fake.requests - before
+        self.results.append({
+            "name": name, "ops": ops, "acks": [x for x in acks if isinstance(x, float)],
+            "e2e": [x for x in e2e if isinstance(x, float)], "calls": calls,
+            "rate_limited": sum((self.fake.rate_limited - rate_before).values()), "elapsed": elapsed,
+            "errors": Counter(type(x).__name__ for x in list(acks) + list(e2e) if isinstance(x, BaseException)),
+        })
+
+    async def _ack(self, uid: int, kind: int, data: dict, channel_id: int, message: dict = None, timeout: float = OP_TIMEOUT):
+        token, sent, callback = await self.fake.interact(uid, kind, data, channel_id, message)
+        acked, body = await asyncio.wait_for(callback, timeout)
+        return token, sent, acked, body
+
+    # ---- giveaway: N joins, then the draw ----
+    async def giveaway_phase(self, bot: commands.Bot):
+        gmod = sys.modules["giveaway"]
+        cog = bot.get_cog("GiveawayCog")
+        g = {"guild_id": GUILD_ID, "channel_id": CHANNEL_ID, "message_id": None, "title": "Load test",
+             "description": "", "reward": "nagroda", "end_time": int(time.time()) + 3600,
+             "winners_count": self.winners, "participants": [], "winners": [], "ended": False}
+        msg = await bot.get_channel(CHANNEL_ID).send(embed=gmod.build_giveaway_embed(g), view=gmod.GiveawayView())
+        g["message_id"] = msg.id
+        cog.store.create(g)
+        message = self.fake.messages[CHANNEL_ID][msg.id]
+
+        async def join(uid: int):
+            _, sent, acked, _ = await self._ack(uid, 3, {"custom_id": "giveaway_join", "component_type": 2},
+                                                CHANNEL_ID, message)
+            return acked - sent
+
+        before, rate_before = Counter(self.fake.requests), Counter(self.fake.rate_limited)
+        start = time.monotonic()
+        acks = await self._gather(join(FIRST_USER_ID + i) for i in range(self.users))
+        elapsed = time.monotonic() - start
+        await asyncio.sleep(gmod.EMBED_UPDATE_WINDOW + 0.5)  # let the coalesced embed edit land
+        self._phase("giveaway_join", self.users, acks, acks, before, rate_before, elapsed)
+
+        # draw: end now and wait for the last announcement chunk
+        before, rate_before = Counter(self.fake.requests), Counter(self.fake.rate_limited)
+        start = time.monotonic()
+        cog.scheduler.schedule(msg.id, time.time())
+        done = None
+        while time.monotonic() - start < OP_TIMEOUT:
+            if any("Wygrałeś(a)" in m["content"] for m in self.fake.messages[CHANNEL_ID].values()):
+                done = time.monotonic() - start
+                break
+            await asyncio.sleep(0.05)
+        self._phase("giveaway_finish", 1, [], [done] if done is not None else [TimeoutError()], before, rate_before,
+                    time.monotonic() - start)
+
+    # ---- tickets: button -> modal -> channel, then close ----
+    async def ticket_phase(self, bot: commands.Bot):
+        tmod = sys.modules["ticketpanel"]
+        panel = await bot.get_channel(CHANNEL_ID).send(view=tmod.TicketPanel())
+        panel_message = self.fake.messages[CHANNEL_ID][panel.id]
+
+        async def open_ticket(uid: int):
+            _, sent, acked, body = await self._ack(
+                uid, 3, {"custom_id": "ticket_btn:Pomoc", "component_type": 2}, CHANNEL_ID, panel_message)
+            modal = body["data"]
+            token, sent_submit, acked_submit, _ = await self._ack(
+                uid, 5, {"custom_id": modal["custom_id"], "components": self._fill(modal["components"])}, CHANNEL_ID)
+            await asyncio.wait_for(self.fake.followups[token], OP_TIMEOUT)
+            # done once the ticket channel shows its close button
+            while self.fake.channel_owner.get(uid) not in self.fake.ready_at:
+                if time.monotonic() - sent > OP_TIMEOUT:
+                    raise TimeoutError(uid)
+                await asyncio.sleep(0.01)
+            return acked - sent, acked_submit - sent_submit, self.fake.ready_at[self.fake.channel_owner[uid]] - sent
+
+        before, rate_before = Counter(self.fake.requests), Counter(self.fake.rate_limited)
+        start = time.monotonic()
+        opened = await self._gather(open_ticket(FIRST_USER_ID + i) for i in range(self.tickets))
+        acks = [x for r in opened if isinstance(r, tuple) for x in r[:2]]
+        e2e = [r[2] if isinstance(r, tuple) else r for r in opened]
+        self._phase("ticket_open", self.tickets, acks, e2e, before, rate_before, time.monotonic() - start)
+
+        owners = {cid: uid for uid, cid in self.fake.channel_owner.items()}
+
+        async def close_ticket(cid: int, message: dict):
+            custom_id = f"close_ticket:{cid}"
+            _, sent, acked, _ = await self._ack(owners.get(cid, OWNER_ID), 3, {"custom_id": custom_id, "component_type": 2}, cid, message)
+            while cid not in self.fake.deleted:
+                if time.monotonic() - sent > OP_TIMEOUT:
+                    raise TimeoutError(cid)
+                await asyncio.sleep(0.05)
+            return acked - sent, self.fake.deleted[cid] - sent
+
+        before, rate_before = Counter(self.fake.requests), Counter(self.fake.rate_limited)
+        start = time.monotonic()
+        closing = list(self.fake.close_buttons.items())
+        closed = await self._gather(close_ticket(cid, message) for cid, message in closing)
+        acks = [r[0] if isinstance(r, tuple) else r for r in closed]
+        e2e = [r[1] if isinstance(r, tuple) else r for r in closed]
+        self._phase("ticket_close", len(closing), acks, e2e, before, rate_before, time.monotonic() - start)
+
+    @staticmethod
+    def _fill(components):
+        # answer every text input of a modal, keeping its row/label layout
+        filled = []
+        for component in components:
+            if component.get("type") == 4:
+                filled.append({"type": 4, "custom_id": component["custom_id"], "value": "test obciążeniowy"})
+            elif "components" in component:
+                filled.append({"type": component["type"], "components": LoadTest._fill(component["components"])})
+            elif "component" in component:
+                filled.append({"type": component["type"], "component": LoadTest._fill([component["component"]])[0]})
+        return filled
+
+    def report(self):
+        ms = lambda seconds: seconds * 1000
+        for phase in self.results:
+            acks, e2e = phase["acks"], phase["e2e"]
+            errors = ", ".join(f"{name} x{count}" for name, count in phase["errors"].items()) or "0"
+            print(f"\n== {phase['name']}: {phase['ops']} operacji w {phase['elapsed']:.2f} s, "
+                  f"błędy: {errors}, 429: {phase['rate_limited']}")
+            for label, values in (("ack", acks), ("end-to-end", e2e)):
+                if values:
+                    print(f"  {label:<11} p50 {ms(percentile(values, 50)):8.1f} ms  p90 {ms(percentile(values, 90)):8.1f} ms  "
+                          f"p99 {ms(percentile(values, 99)):8.1f} ms  max {ms(max(values)):8.1f} ms")
+            ops = max(phase["ops"], 1)
+            print(f"  REST na operację: {sum(phase['calls'].values()) / ops:.2f}")
+            for route, calls in phase["calls"].most_common():
+                print(f"    {calls / ops:8.2f}  {route}")
+        rejected = sum(throttle.rejections._values.values())
+        if rejected:
+            print(f"\nOdrzucone przez throttle: {rejected}")
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tickets = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    winners = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+    asyncio.run(LoadTest(users, tickets, concurrency, winners).run())
+
+
+if __name__ == "__main__":
+    main()
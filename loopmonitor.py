@@ -0,0 +1,161 @@
+# loopmonitor.py — event-loop lag monitor with a stack-capturing watchdog
+import asyncio
+import heapq
+import itertools
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+
+import metrics
+
+LOOP_MONITOR = os.getenv("LOOP_MONITOR", "0") == "1"
+LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100")) / 1000  # stalls longer than this are logged
+MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5"))  # seconds between lag probes
+STALLS_KEEP = int(os.getenv("LOOP_STALLS_KEEP", "20"))  # worst stalls kept for dumps
+
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+loop_lag = metrics.Histogram(
+    "victorreps_loop_lag_seconds", "Extra delay of a scheduled wake-up on the event loop.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+loop_stalls = metrics.Counter(
+    "victorreps_loop_stalls_total", "Event-loop stalls above the lag threshold.", ("handler",))
+
+
+def _where(frame) -> str:
+    code = frame.f_code
+    # co_qualname is 3.11+
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def handler_name(frame) -> str:
+    # the callback asyncio is running (first frame above Handle._run) and, if it differs,
+    # the innermost frame from our own modules, i.e. where it is blocking
+    if frame is None:
+        return "?"
+    entry = blocking = None
+    innermost = frame
+    while frame is not None:
+        if blocking is None and frame.f_code.co_filename.startswith(_PROJECT_DIR):
+            blocking = frame
+        back = frame.f_back
+        if back is not None and back.f_code.co_name == "_run" and back.f_code.co_filename.endswith("events.py"):
+            entry = frame
+            break
+        frame = back
+    entry = entry or blocking or innermost
+    if blocking is None or blocking is entry:
+        return _where(entry)
+    return f"{_where(entry)} -> {_where(blocking)}"
+
+
+class LoopMonitor:
+    """Measures how late the loop wakes a sleeping probe task.
+
+    A daemon thread watches the probe's heartbeat; once it is older than the
+    threshold the loop thread is stuck inside a callback, so the watchdog grabs
+    that thread's stack via ``sys._current_frames`` while it is still blocked.
+    When the loop recovers the probe records the stall's length, logs it and
+    keeps the worst ``keep`` stalls for ``dump``.
+    """
+
+    def __init__(self, interval: float = MONITOR_INTERVAL, threshold: float = LAG_THRESHOLD, keep: int = STALLS_KEEP):
+        self.interval = interval
+        self.threshold = threshold
+        self.keep = keep
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._worst = []  # min-heap of (lag, seq, record)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._pending = None  # stall captured by the watchdog, waiting for its length
+        self._thread_id = None
+        self._task = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._probe())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+        try:
+            loop.add_signal_handler(signal.SIGUSR1, self.print_dump)
+        except (AttributeError, NotImplementedError, RuntimeError):
+            pass  # no SIGUSR1 on Windows; /debug/stalls still works
+        print(f"🩺 Monitor pętli aktywny (próg {self.threshold * 1000:g} ms).")
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _probe(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - start - self.interval, 0.0)
+            with self._lock:
+                self._beat = now
+                pending, self._pending = self._pending, None
+            loop_lag.observe(lag)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if pending is not None or lag >= self.threshold:
+                self._record(pending or {"at": time.time() - lag, "handler": "?", "stack": []}, lag)
+
+    def _watch(self):
+        # polls often enough to catch a stall while it is still happening
+        period = max(min(self.threshold, self.interval) / 4, 0.005)
+        while not self._stop.wait(period):
+            with self._lock:
+                stalled = time.monotonic() - self._beat - self.interval
+                if stalled < self.threshold or self._pending is not None:
+                    continue
+                frame = sys._current_frames().get(self._thread_id)
+                self._pending = {
+                    "at": time.time() - stalled,
+                    "handler": handler_name(frame),
+                    "stack": traceback.format_stack(frame) if frame is not None else [],
+                }
+
+    def _record(self, stall: dict, lag: float):
+        stall["lag_ms"] = round(lag * 1000, 1)
+        loop_stalls.inc(stall["handler"])
+        print(f"🐢 Pętla zablokowana na {stall['lag_ms']} ms w {stall['handler']}")
+        if stall["stack"]:
+            print("".join(stall["stack"][-12:]), end="")
+        entry = (lag, next(self._seq), stall)
+        if len(self._worst) < self.keep:
+            heapq.heappush(self._worst, entry)
+        else:
+            heapq.heappushpop(self._worst, entry)
+
+    def dump(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "worst": [stall for _, _, stall in sorted(self._worst, reverse=True)],
+        }
+
+    def print_dump(self):
+        data = self.dump()
+        print(f"🩺 Najgorsze zablokowania pętli (max {data['max_lag_ms']} ms):")
+        for stall in data["worst"]:
+            print(f"  {stall['lag_ms']:>8} ms  {stall['handler']}")
+
+
+monitor = LoopMonitor()
@@ -2,70 +2,96 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
+import hashlib
+import json
 import os
-from flask import Flask
-from threading import Thread
 from datetime import datetime
 
-from giveaway import GiveawayView  # <<< NAJWAŻNIEJSZE
-import json
+import gateway
+import loopmonitor
+import metrics
+from outbox import outbox
+import storage
+from health import HealthServer
 
 # ------------------ CONFIG ------------------
 TOKEN = os.getenv("DISCORD_TOKEN") or os.getenv("TOKEN")
-INTENTS = discord.Intents.all()
+CLIENT_OPTIONS = gateway.client_options()  # LEAN_GATEWAY=1: minimal intents, no member cache
+TREE_HASH_FILE = "command_tree.json"  # {application_id: hash of the last synced command tree}
+FORCE_SYNC = os.getenv("FORCE_SYNC", "0") == "1"
 
-bot = commands.Bot(command_prefix="!", intents=INTENTS)
+bot = commands.Bot(command_prefix="!", **CLIENT_OPTIONS)
 start_time = datetime.utcnow()
+# time every command/component/REST call/state write; must run before the cogs load
+metrics.install(bot)
+# interaction responses jump ahead of queued announcements/edits
+outbox.install()
 
-# ------------------ FLASK KEEP-ALIVE ------------------
-app = Flask('')
-
-@app.route('/')
-def home():
-    return "VictorRepsBot is running!"
-
-def run_flask():
-    app.run(host='0.0.0.0', port=8080)
-
-def keep_alive():
-    t = Thread(target=run_flask)
-    t.start()
-
-keep_alive()
+# stylizacja.py is the pre-refactor copy of the ticket panel: its /ticketpanel collides with
+# TicketPanelCog's, so it never loaded and is no longer listed
+EXTENSIONS = ["giveaway", "ticketpanel", "utility_ping"]
+REQUIRED_EXTENSIONS = ["giveaway", "ticketpanel"]  # /readyz stays 503 until these are loaded
 
 
 # ------------------ PRZYWRACANIE PERSISTENT VIEW ------------------
-def restore_giveaway_views():
-    if not os.path.exists("giveaways.json"):
+async def restore_giveaway_views():
+    # load_extension re-executes giveaway.py, so the live store hangs off the loaded cog
+    cog = bot.get_cog("GiveawayCog")
+    if not cog:
         return
 
-    try:
-        with open("giveaways.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except:
-        return
+    # the join button has a static custom_id, so the cog's single add_view covers every message;
+    # what is left is finishing giveaways whose deadline passed while we were offline
+    await cog.recover()
+    print(f"🔁 Aktywne giveawaye: {len(cog.store.live)}.")
 
-    restored = 0
-    for msg_id, g in data.items():
-        if g.get("ended"):
-            continue
 
-        bot.add_view(GiveawayView(int(msg_id)))
-        restored += 1
+# ------------------ SYNCHRONIZACJA KOMEND ------------------
+_tree_checked = False
 
-    print(f"🔁 Przywrócono {restored} persistent view dla giveawayów.")
+def command_tree_hash() -> str:
+    # the exact payload sync() would upload, serialised deterministically
+    payload = sorted(
+        (cmd.to_dict(bot.tree) for cmd in bot.tree.get_commands()),
+        key=lambda c: (c.get("type", 1), c["name"]),
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
 
+async def sync_commands():
+    # on_ready fires again on every reconnect; the tree can only change with a new process
+    # a failed sync leaves the flag unset, so the next on_ready retries
+    global _tree_checked
+    if _tree_checked:
+        return
+
+    app_id = str(bot.application_id)
+    digest = command_tree_hash()
+    hashes = storage.read_json(TREE_HASH_FILE)
+    if not FORCE_SYNC and hashes.get(app_id) == digest:
+        print("✅ Komendy bez zmian, pomijam synchronizację.")
+        _tree_checked = True
+        return
 
-# ------------------ EVENT: on_ready ------------------
-@bot.event
-async def on_ready():
     try:
         synced = await bot.tree.sync()
         print(f"✅ Zsynchronizowano {len(synced)} komend.")
     except Exception as e:
         print("Błąd synchronizacji:", e)
+        return
+    _tree_checked = True
+    hashes[app_id] = digest
+    try:
+        storage.write_atomic(TREE_HASH_FILE, json.dumps(hashes, indent=4))
+    except Exception:
+        pass
 
-    bot.loop.create_task(asyncio.to_thread(restore_giveaway_views))
+
+# ------------------ EVENT: on_ready ------------------
+@bot.event
+async def on_ready():
+    await restore_giveaway_views()
+
+    await sync_commands()
 
     await bot.change_presence(
         activity=discord.Game(name="VictorReps | system premium")
@@ -76,8 +102,7 @@ async def on_ready():
 
 # ------------------ ŁADOWANIE COGÓW ------------------
 async def load_extensions():
-    extensions = ["giveaway", "ticketpanel", "stylizacja", "utility_ping"]
-    for ext in extensions:
+    for ext in EXTENSIONS:
         try:
             await bot.load_extension(ext)
             print(f"Załadowano: {ext}")
@@ -85,9 +110,18 @@ async def load_extensions():
             print(f"❌ Błąd ładowania {ext}: {e}")
 
 async def main():
-    async with bot:
-        await load_extensions()
-        await bot.start(TOKEN)
+    # health/readiness endpoints run on the bot's own loop
+    health = HealthServer(bot, REQUIRED_EXTENSIONS)
+    await health.start()
+    if loopmonitor.LOOP_MONITOR:
+        loopmonitor.monitor.start()
+    try:
+        async with bot:
+            await load_extensions()
+            await bot.start(TOKEN)
+    finally:
+        await health.stop()
 
 # ------------------ START BOTA ------------------
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
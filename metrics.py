@@ -0,0 +1,373 @@
+# metrics.py — in-process counters/histograms rendered in Prometheus text format
+import bisect
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+
+import discord
+from discord import app_commands
+from discord.ui import View, Modal
+from discord.ui.view import ViewStore
+
+import storage
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# what the current task is handling: (kind, name) for interactions, route for REST calls
+_current_interaction = contextvars.ContextVar("current_interaction", default=None)
+_current_route = contextvars.ContextVar("current_route", default=None)
+
+
+# ---------------- metric types ----------------
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()  # storage timings arrive from worker threads
+        REGISTRY.append(self)
+
+    def _label_str(self, values, extra=None) -> str:
+        pairs = list(zip(self.labels, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        inner = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+        return "{" + inner + "}"
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        super().__init__(name, help, labels)
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield from super().render()
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{self._label_str(labels)} {value:g}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        yield from super().render()
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{self._label_str(labels, ('le', f'{bound:g}'))} {cumulative}"
+            yield f"{self.name}_bucket{self._label_str(labels, ('le', '+Inf'))} {series[-1]}"
+            yield f"{self.name}_sum{self._label_str(labels)} {series[-2]:.6f}"
+            yield f"{self.name}_count{self._label_str(labels)} {series[-1]}"
+
+
+REGISTRY = []
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------- metrics ----------------
+interaction_seconds = Histogram(
+    "victorreps_interaction_seconds", "Time spent in a command or component callback.", ("kind", "name"))
+interaction_errors = Counter(
+    "victorreps_interaction_errors_total", "Callbacks that raised.", ("kind", "name"))
+interaction_ack_seconds = Histogram(
+    "victorreps_interaction_ack_seconds", "Time from receiving an interaction to its first response.", ("kind",))
+rest_seconds = Histogram(
+    "victorreps_rest_seconds", "Discord REST call duration, including rate-limit sleeps.", ("route",))
+rest_requests = Counter(
+    "victorreps_rest_requests_total", "Discord REST calls by route and status.", ("route", "status"))
+ratelimit_hits = Counter(
+    "victorreps_ratelimit_hits_total", "429 responses by route.", ("route", "scope"))
+ratelimit_wait = Counter(
+    "victorreps_ratelimit_wait_seconds_total",
+    "Seconds REST calls spent rate limited: waiting for the route's bucket, or sleeping on a 429.",
+    ("route", "reason"))
+storage_seconds = Histogram(
+    "victorreps_storage_seconds", "State load/write duration.", ("backend", "op"))
+storage_bytes = Gauge(
+    "victorreps_storage_bytes", "Size on disk after the last load/write.", ("backend", "op"))
+storage_ops = Counter(
+    "victorreps_storage_ops_total", "Ops written to storage backends.", ("backend",))
+
+
+# ---------------- hooks ----------------
+def _callback_name(item) -> str:
+    callback = getattr(item, "callback", None)
+    func = getattr(callback, "callback", None) or getattr(callback, "__func__", None) or callback
+    return getattr(func, "__qualname__", type(item).__qualname__)
+
+
+async def _timed(kind: str, name: str, coro):
+    token = _current_interaction.set((kind, name))
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        interaction_seconds.observe(time.perf_counter() - start, kind, name)
+        _current_interaction.reset(token)
+
+
+def _wrap_tree_call(original):
+    @functools.wraps(original)
+    async def _call(self, interaction):
+        name = (interaction.data or {}).get("name", "?")
+        await _timed("command", name, original(self, interaction))
+        if interaction.command_failed:
+            interaction_errors.inc("command", name)
+    return _call
+
+
+def _wrap_view_task(original):
+    @functools.wraps(original)
+    async def _scheduled_task(self, item, interaction):
+        return await _timed("component", _callback_name(item), original(self, item, interaction))
+    return _scheduled_task
+
+
+def _wrap_modal_task(original):
+    @functools.wraps(original)
+    async def _scheduled_task(self, interaction, *args):
+        return await _timed("modal", f"{type(self).__qualname__}.on_submit", original(self, interaction, *args))
+    return _scheduled_task
+
+
+def _wrap_dynamic_call(original):
+    @functools.wraps(original)
+    async def schedule_dynamic_item_call(self, component_type, factory, interaction, *args):
+        return await _timed("component", f"{factory.__qualname__}.callback",
+                            original(self, component_type, factory, interaction, *args))
+    return schedule_dynamic_item_call
+
+
+def _wrap_interaction_init(original):
+    @functools.wraps(original)
+    def __init__(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        self.extras["received_at"] = time.perf_counter()
+    return __init__
+
+
+def _wrap_response(original):
+    @functools.wraps(original)
+    async def respond(self, *args, **kwargs):
+        first = not self.is_done()
+        result = await original(self, *args, **kwargs)
+        received = self._parent.extras.get("received_at")
+        if first and received is not None:
+            interaction_ack_seconds.observe(time.perf_counter() - received, self._parent.type.name)
+        return result
+    return respond
+
+
+def _wrap_http_request(original):
+    @functools.wraps(original)
+    async def request(self, route, **kwargs):
+        label = f"{route.method} {route.path}"
+        token = _current_route.set(label)
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await original(self, route, **kwargs)
+        except discord.HTTPException as e:
+            status = str(e.status)
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            rest_seconds.observe(time.perf_counter() - start, label)
+            rest_requests.inc(label, status)
+            _current_route.reset(token)
+    return request
+
+
+def _wrap_ratelimit_wait(original):
+    # once a bucket is exhausted discord.py sleeps pre-emptively (logged only at DEBUG): the
+    # request that used the last token sleeps in __aexit__, the ones behind it in acquire
+    @functools.wraps(original)
+    async def wait(self, *args):
+        start = time.perf_counter()
+        try:
+            return await original(self, *args)
+        finally:
+            ratelimit_wait.inc(_current_route.get() or "?", "bucket", amount=time.perf_counter() - start)
+    return wait
+
+
+def _file_size(backend) -> int:
+    paths = {getattr(backend, "path", None), getattr(backend, "journal_path", None),
+             getattr(getattr(backend, "db", None), "path", None)}
+    return sum(os.path.getsize(p) for p in paths if p and os.path.exists(p))
+
+
+def _wrap_backend(cls):
+    load, write = cls.load, cls.write
+
+    @functools.wraps(load)
+    def timed_load(self):
+        start = time.perf_counter()
+        try:
+            return load(self)
+        finally:
+            storage_seconds.observe(time.perf_counter() - start, cls.__name__, "load")
+            storage_bytes.set(cls.__name__, "load", value=_file_size(self))
+
+    @functools.wraps(write)
+    def timed_write(self, ops, snapshot):
+        start = time.perf_counter()
+        try:
+            return write(self, ops, snapshot)
+        finally:
+            storage_seconds.observe(time.perf_counter() - start, cls.__name__, "write")
+            storage_bytes.set(cls.__name__, "write", value=_file_size(self))
+            storage_ops.inc(cls.__name__, amount=len(ops))
+
+    cls.load, cls.write = timed_load, timed_write
+
+
+class _LogHook(logging.Handler):
+    # discord.py reports 429s and swallowed callback errors only through logging
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = record.msg if isinstance(record.msg, str) else ""
+            if record.name == "discord.http" and record.levelno >= logging.WARNING:
+                route = _current_route.get() or "?"
+                if message.startswith("We are being rate limited"):
+                    ratelimit_hits.inc(route, "route")
+                    if message.endswith("Retrying in %.2f seconds."):
+                        ratelimit_wait.inc(route, "retry_after", amount=float(record.args[2]))
+                elif message.startswith("Global rate limit has been hit"):
+                    ratelimit_hits.inc(route, "global")
+                    ratelimit_wait.inc(route, "global", amount=float(record.args[0]))
+            elif record.levelno >= logging.ERROR and record.name.startswith("discord.ui"):
+                current = _current_interaction.get()
+                if current:
+                    interaction_errors.inc(*current)
+        except Exception:
+            pass
+
+
+_installed = False
+
+# (owner, attribute, parameters, wrapper) patched by install(), as of discord.py 2.7.x (see requirements.txt)
+_PATCHED = (
+    (app_commands.CommandTree, "_call", ("self", "interaction"), _wrap_tree_call),
+    (View, "_scheduled_task", ("self", "item", "interaction"), _wrap_view_task),
+    (Modal, "_scheduled_task", ("self", "interaction", "components", "resolved"), _wrap_modal_task),
+    (ViewStore, "schedule_dynamic_item_call", ("self", "component_type", "factory", "interaction", "custom_id", "match"),
+     _wrap_dynamic_call),
+    (discord.Interaction, "__init__", ("self", "data", "state"), _wrap_interaction_init),
+    (discord.http.HTTPClient, "request", ("self", "route", "files", "form", "kwargs"), _wrap_http_request),
+    (discord.http.Ratelimit, "acquire", ("self",), _wrap_ratelimit_wait),
+    (discord.http.Ratelimit, "__aexit__", ("self", "type", "value", "traceback"), _wrap_ratelimit_wait),
+)
+# log messages _LogHook turns into rate-limit metrics
+_HTTP_LOG_MESSAGES = ("We are being rate limited", "Retrying in %.2f seconds.", "Global rate limit has been hit")
+
+
+def _internals_problem(owner, name: str, params) -> str:
+    # why this hook can't be patched safely, or "" if the internals are as expected
+    func = getattr(owner, name, None)
+    if func is None:
+        return f"{owner.__qualname__}.{name} is missing"
+    found = tuple(inspect.signature(func).parameters)
+    if found != params:
+        return f"{owner.__qualname__}.{name}{found} != {params}"
+    return ""
+
+
+def _warn(problem: str):
+    print(f"⚠️ Metryki: discord.py {discord.__version__} różni się od 2.7.x: {problem}")
+
+
+def install(bot):
+    """Patch discord.py dispatch points once so every cog is measured without changes.
+
+    Commands go through ``CommandTree._call``, components through the view/modal
+    ``_scheduled_task`` and the dynamic-item dispatcher, acknowledgements
+    through ``InteractionResponse`` and REST through ``HTTPClient.request``.
+    A private hook whose signature no longer matches is skipped with a warning
+    rather than patched blindly; the bot itself keeps working.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    for owner, name, params, wrap in _PATCHED:
+        problem = _internals_problem(owner, name, params)
+        if problem:
+            _warn(f"{problem} — pomijam ten hook.")
+            continue
+        setattr(owner, name, wrap(getattr(owner, name)))
+    for name in ("defer", "send_message", "send_modal", "edit_message"):
+        setattr(discord.InteractionResponse, name, _wrap_response(getattr(discord.InteractionResponse, name)))
+    for cls in (storage.JsonGiveawayBackend, storage.JournalGiveawayBackend, storage.SqliteGiveawayBackend,
+                storage.JsonTicketBackend, storage.SqliteTicketBackend):
+        _wrap_backend(cls)
+    try:
+        source = inspect.getsource(discord.http.HTTPClient.request)
+    except (OSError, TypeError):
+        source = None
+    for message in _HTTP_LOG_MESSAGES:
+        if source is not None and message not in source:
+            _warn(f"discord.http nie loguje już {message!r} — liczniki 429 mogą być niepełne.")
+    hook = _LogHook(logging.WARNING)
+    logging.getLogger("discord.http").addHandler(hook)
+    logging.getLogger("discord.ui").addHandler(hook)
+    # the handlers only see records the loggers let through
+    for name in ("discord.http", "discord.ui"):
+        logger = logging.getLogger(name)
+        if logger.getEffectiveLevel() > logging.WARNING:
+            logger.setLevel(logging.WARNING)
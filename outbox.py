@@ -0,0 +1,180 @@
+# outbox.py — paced per-route queue for non-urgent sends/edits, chunked mention lists
+import asyncio
+import functools
+import os
+import time
+
+import discord
+
+OUTBOX_QUEUE_SIZE = int(os.getenv("OUTBOX_QUEUE_SIZE", "100"))  # pending ops per route before callers wait
+OUTBOX_RATE = float(os.getenv("OUTBOX_RATE", "20"))  # background REST calls per second, all routes together
+URGENT_HOLD = 1.0  # longest a background call waits for interaction responses to clear
+MESSAGE_LIMIT = 2000
+EMBED_DESCRIPTION_LIMIT = 4096
+
+
+def chunk_mentions(user_ids, prefix: str = "", suffix: str = "", sep: str = ", ", limit: int = MESSAGE_LIMIT) -> list:
+    """Split a mention list into messages under ``limit`` characters.
+
+    The first message starts with ``prefix``, the last ends with ``suffix``;
+    mentions are never cut in half.
+    """
+    chunks = []
+    current = prefix
+    first = True
+    for uid in user_ids:
+        mention = f"<@{int(uid)}>"
+        piece = mention if first else sep + mention
+        if len(current) + len(piece) > limit:
+            chunks.append(current)
+            current = mention
+        else:
+            current += piece
+        first = False
+    if len(current) + len(suffix) > limit:
+        chunks.append(current)
+        current = ""
+    chunks.append(current + suffix)
+    return chunks
+
+
+def mention_summary(user_ids, limit: int, sep: str = ", ") -> str:
+    # as many mentions as fit in ``limit`` characters, then "… i jeszcze N"
+    mentions = [f"<@{int(uid)}>" for uid in user_ids]
+    full = sep.join(mentions)
+    if len(full) <= limit:
+        return full
+    out = ""
+    for i, mention in enumerate(mentions):
+        piece = (sep if out else "") + mention
+        tail = f" … i jeszcze {len(mentions) - i}"
+        if len(out) + len(piece) + len(tail) > limit:
+            return out + tail
+        out += piece
+    return out
+
+
+def _report(route, future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"❌ Błąd wysyłki ({route[0]} {route[1]}): {future.exception()}")
+
+
+class Outbox:
+    """Background REST calls, one FIFO queue and worker per (action, channel) route.
+
+    Discord buckets message sends/edits per channel, so each route drains on
+    its own; a full queue makes ``submit`` wait (back-pressure) instead of
+    growing without bound. All workers share one pacer capped at ``rate`` calls
+    per second, and before each call they yield to any interaction response or
+    followup in flight, so button presses are acknowledged first.
+    """
+
+    def __init__(self, rate: float = OUTBOX_RATE, queue_size: int = OUTBOX_QUEUE_SIZE):
+        self.rate = rate
+        self.queue_size = queue_size
+        self._queues = {}  # route -> asyncio.Queue of (factory, future)
+        self._workers = {}  # route -> task, exits when its queue runs dry
+        self._next_slot = 0.0
+        self._urgent = 0
+        self._clear = asyncio.Event()
+        self._clear.set()
+
+    async def submit(self, route, factory) -> asyncio.Future:
+        """Queue ``factory()`` (a coroutine function) on ``route``; returns a future with its result."""
+        queue = self._queues.get(route)
+        if queue is None:
+            queue = self._queues[route] = asyncio.Queue(self.queue_size)
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(functools.partial(_report, route))
+        await queue.put((factory, future))
+        if route not in self._workers:
+            self._workers[route] = asyncio.create_task(self._work(route, queue))
+        return future
+
+    async def send(self, channel, content: str = None, **kwargs) -> asyncio.Future:
+        return await self.submit(("send", channel.id), functools.partial(channel.send, content, **kwargs))
+
+    async def edit(self, message, **kwargs) -> asyncio.Future:
+        return await self.submit(("edit", message.channel.id), functools.partial(message.edit, **kwargs))
+
+    async def announce(self, channel, user_ids, prefix: str = "", suffix: str = "") -> list:
+        # one message per chunk, in order (same route = same queue)
+        return [await self.send(channel, chunk) for chunk in chunk_mentions(user_ids, prefix, suffix)]
+
+    async def _work(self, route, queue: asyncio.Queue):
+        try:
+            while True:
+                try:
+                    factory, future = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if future.cancelled():
+                    continue
+                await self._wait_turn()
+                try:
+                    result = await factory()
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            # nothing can be queued between the empty check and here (no await)
+            self._workers.pop(route, None)
+            if queue.empty():
+                self._queues.pop(route, None)
+
+    async def _wait_turn(self):
+        if self._urgent:
+            try:
+                await asyncio.wait_for(self._clear.wait(), timeout=URGENT_HOLD)
+            except asyncio.TimeoutError:
+                pass
+        if self.rate > 0:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self.rate
+            if slot > now:
+                await asyncio.sleep(slot - now)
+
+    # ---- interaction priority ----
+    def _urgent_start(self):
+        self._urgent += 1
+        self._clear.clear()
+
+    def _urgent_end(self):
+        self._urgent -= 1
+        if not self._urgent:
+            self._clear.set()
+
+    def _wrap_urgent(self, original):
+        @functools.wraps(original)
+        async def urgent(*args, **kwargs):
+            self._urgent_start()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self._urgent_end()
+        return urgent
+
+    def install(self):
+        """Mark interaction responses and followups as urgent so queued work steps aside."""
+        if getattr(discord.InteractionResponse, "_outbox_installed", False):
+            return
+        discord.InteractionResponse._outbox_installed = True
+        for name in ("defer", "send_message", "send_modal", "edit_message"):
+            setattr(discord.InteractionResponse, name, self._wrap_urgent(getattr(discord.InteractionResponse, name)))
+        webhook_send = discord.Webhook.send
+
+        @functools.wraps(webhook_send)
+        async def send(webhook, *args, **kwargs):
+            # interaction.followup is an application webhook; plain webhooks keep their normal path
+            if webhook.type is discord.WebhookType.application:
+                return await self._wrap_urgent(webhook_send)(webhook, *args, **kwargs)
+            return await webhook_send(webhook, *args, **kwargs)
+
+        discord.Webhook.send = send
+
+
+outbox = Outbox()
@@ -0,0 +1,248 @@
+# participants.py
+import base64
+import random
+import sys
+from array import array
+from collections.abc import Sequence
+
+_EMPTY = -1
+_HASH_MUL = 0x9E3779B97F4A7C15  # Fibonacci hashing constant
+_U64 = (1 << 64) - 1
+MAX_WEIGHT = 255
+
+
+class ParticipantSet(Sequence):
+    """Insertion-ordered set of Discord user IDs stored as 64-bit integers.
+
+    IDs live in one ``array('q')``; membership goes through an open-addressing
+    table of positions (``array('i')``), so lookups are O(1) without a Python
+    object per entrant. Being a Sequence, it can be passed straight to
+    ``random.sample`` / ``random.choice``. Each entrant also carries a small
+    integer weight (bonus entries) used by ``draw``.
+    """
+
+    __slots__ = ("_ids", "_weights", "_weighted", "_max_weight", "_table", "_mask", "_shift")
+
+    def __init__(self, ids=(), weights=None):
+        self._ids = array("q")
+        self._weights = array("B")
+        self._weighted = False
+        self._max_weight = 1
+        self._alloc(8)
+        if weights is None:
+            for uid in ids:
+                self.add(uid)
+        else:
+            for uid, weight in zip(ids, weights):
+                self.add(uid, weight)
+
+    # ---- hash table ----
+    def _alloc(self, size: int):
+        self._table = array("i", [_EMPTY]) * size
+        self._mask = size - 1
+        self._shift = 64 - (size.bit_length() - 1)
+
+    def _slot(self, uid: int) -> int:
+        # returns the slot holding uid, or the empty slot where it would go
+        table, ids, mask = self._table, self._ids, self._mask
+        i = ((uid * _HASH_MUL) & _U64) >> self._shift
+        while True:
+            pos = table[i]
+            if pos == _EMPTY or ids[pos] == uid:
+                return i
+            i = (i + 1) & mask
+
+    def _grow(self):
+        self._alloc(len(self._table) * 2)
+        table = self._table
+        for pos, uid in enumerate(self._ids):
+            table[self._slot(uid)] = pos
+
+    # ---- set / sequence API ----
+    def add(self, uid, weight: int = 1) -> bool:
+        uid = int(uid)
+        i = self._slot(uid)
+        if self._table[i] != _EMPTY:
+            return False
+        weight = max(1, min(int(weight), MAX_WEIGHT))
+        self._table[i] = len(self._ids)
+        self._ids.append(uid)
+        self._weights.append(weight)
+        if weight != 1:
+            self._weighted = True
+            self._max_weight = max(self._max_weight, weight)
+        if len(self._ids) * 2 > len(self._table):
+            self._grow()
+        return True
+
+    def index(self, uid, *args) -> int:
+        pos = self._table[self._slot(int(uid))]
+        if pos == _EMPTY:
+            raise ValueError(f"{uid} is not a participant")
+        return pos
+
+    def weight(self, uid) -> int:
+        return self._weights[self.index(uid)]
+
+    def entries(self):
+        # (user_id, weight) pairs in join order
+        return zip(self._ids, self._weights)
+
+    @property
+    def weighted(self) -> bool:
+        return self._weighted
+
+    def __contains__(self, uid) -> bool:
+        try:
+            uid = int(uid)
+        except (TypeError, ValueError):
+            return False
+        return self._table[self._slot(uid)] != _EMPTY
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._ids[index].tolist()
+        return self._ids[index]
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __repr__(self):
+        return f"ParticipantSet(len={len(self._ids)})"
+
+    def sample_excluding(self, k: int, exclude) -> list:
+        """Draw up to ``k`` distinct IDs that are not in ``exclude`` without copying the pool."""
+        exclude = {int(x) for x in exclude}
+        available = len(self._ids) - sum(1 for x in exclude if x in self)
+        k = min(k, available)
+        picked = []
+        seen = set(exclude)
+        # rejection sampling is O(k) while the pool is mostly eligible
+        attempts = 0
+        while len(picked) < k and attempts < 8 * k + 32:
+            uid = self._ids[random.randrange(len(self._ids))]
+            attempts += 1
+            if uid not in seen:
+                seen.add(uid)
+                picked.append(uid)
+        if len(picked) < k:
+            rest = [uid for uid in self._ids if uid not in seen]
+            picked.extend(random.sample(rest, k - len(picked)))
+        return picked
+
+    def draw(self, k: int, exclude=()) -> list:
+        """Weighted draw of up to ``k`` distinct IDs, skipping ``exclude``.
+
+        Small draws use rejection sampling (pick uniformly, accept with
+        weight / max_weight), which costs O(k * max_weight / mean_weight) and never
+        touches the whole pool. If that stalls (k close to n, or most of the pool
+        excluded) the rest is drawn from a Fenwick tree, O(log n) per pick and removal.
+        """
+        if not self._weighted:
+            return self.sample_excluding(k, exclude)
+        ids, weights, n, max_weight = self._ids, self._weights, len(self._ids), self._max_weight
+        seen = {int(x) for x in exclude}
+        picked = []
+        attempts = 0
+        while len(picked) < k and attempts < 4 * k * max_weight + 32:
+            attempts += 1
+            pos = random.randrange(n)
+            uid = ids[pos]
+            if uid not in seen and random.random() * max_weight < weights[pos]:
+                seen.add(uid)
+                picked.append(uid)
+        if len(picked) == k:
+            return picked
+        sampler = FenwickSampler(weights)
+        for uid in seen:
+            if uid in self:
+                sampler.remove(self.index(uid))
+        while len(picked) < k and sampler.total > 0:
+            pos = sampler.sample()
+            sampler.remove(pos)
+            picked.append(self._ids[pos])
+        return picked
+
+    # ---- encoding ----
+    def encode(self) -> str:
+        # little-endian int64 -> base64: ~11 chars per ID instead of a quoted decimal string;
+        # weights (1 byte each) are appended after a ":" only if any entrant has bonus entries
+        ids = self._ids
+        if sys.byteorder == "big":
+            ids = array("q", ids)
+            ids.byteswap()
+        data = base64.b64encode(ids.tobytes()).decode("ascii")
+        if self._weighted:
+            data += ":" + base64.b64encode(self._weights.tobytes()).decode("ascii")
+        return data
+
+    @classmethod
+    def decode(cls, data: str) -> "ParticipantSet":
+        ids_part, _, weights_part = data.partition(":")
+        ids = array("q")
+        ids.frombytes(base64.b64decode(ids_part))
+        if sys.byteorder == "big":
+            ids.byteswap()
+        weights = None
+        if weights_part:
+            weights = array("B")
+            weights.frombytes(base64.b64decode(weights_part))
+        return cls(ids, weights)
+
+    @classmethod
+    def coerce(cls, value) -> "ParticipantSet":
+        # accepts the legacy list of strings, the encoded form, or an existing set
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls.decode(value)
+        return cls(value or ())
+
+
+class FenwickSampler:
+    """Binary indexed tree over integer weights: O(n) build, O(log n) sample and remove."""
+
+    __slots__ = ("_tree", "_weights", "_n", "_top", "total")
+
+    def __init__(self, weights):
+        n = len(weights)
+        tree = array("q", [0]) * (n + 1)
+        tree[1:] = array("q", weights)
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self._tree = tree
+        self._weights = array("q", weights)
+        self._n = n
+        self._top = 1 << (n.bit_length() - 1) if n else 0
+        self.total = sum(self._weights)
+
+    def remove(self, pos: int):
+        weight = self._weights[pos]
+        if not weight:
+            return
+        self._weights[pos] = 0
+        self.total -= weight
+        tree, n = self._tree, self._n
+        i = pos + 1
+        while i <= n:
+            tree[i] -= weight
+            i += i & -i
+
+    def sample(self) -> int:
+        # walk down the implicit tree to the first prefix sum exceeding r
+        r = random.randrange(self.total)
+        tree, n = self._tree, self._n
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= r:
+                pos = nxt
+                r -= tree[nxt]
+            step >>= 1
+        return pos
@@ -0,0 +1,433 @@
+# storage.py
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from participants import ParticipantSet
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "journal").lower()  # "journal", "json" or "sqlite"
+STORAGE_DB = os.getenv("STORAGE_DB", "victorreps.db")
+JOURNAL_COMPACT_BYTES = int(os.getenv("JOURNAL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+
+GIVEAWAY_FIELDS = ("guild_id", "channel_id", "title", "description", "reward", "end_time", "winners_count")
+
+
+def write_atomic(path: str, payload: str):
+    # write next to the target and rename over it, so a crash never leaves a truncated file
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_json(path: str):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+# ---------------- JSON documents (default) ----------------
+class JsonGiveawayBackend:
+    # the whole document is rewritten, so the store hands over a snapshot on every flush
+    wants_snapshot = True
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        return read_json(self.path)
+
+    def write(self, ops, snapshot):
+        write_atomic(self.path, json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")))
+
+
+class JournalGiveawayBackend:
+    """Snapshot file plus an append-only JSONL journal of ops.
+
+    Every flush appends its ops (O(batch), independent of total state). Once the
+    journal grows past ``compact_bytes`` the store hands over a snapshot, which is
+    written atomically before the journal is truncated. Replaying ops is
+    idempotent, so a crash between those two steps is harmless.
+    """
+
+    def __init__(self, path: str, compact_bytes: int = JOURNAL_COMPACT_BYTES):
+        self.path = path
+        self.journal_path = f"{os.path.splitext(path)[0]}.journal.jsonl"
+        self.compact_bytes = compact_bytes
+        self._journal_size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+
+    @property
+    def wants_snapshot(self):
+        return self._journal_size >= self.compact_bytes
+
+    def load(self):
+        data = read_json(self.path)
+        if not os.path.exists(self.journal_path):
+            return data
+        replayed = 0
+        good_size = 0  # bytes up to the last complete line
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # torn last line from a crash mid-append
+                    break
+                good_size += len(line)
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    continue
+                apply_giveaway_op(data, op)
+                replayed += 1
+        if good_size != os.path.getsize(self.journal_path):
+            # cut the partial bytes off, or the next append would be glued onto them and lost
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_size)
+                f.flush()
+                os.fsync(f.fileno())
+            print(f"✂️ Obcięto niepełny wpis na końcu {self.journal_path}.")
+        self._journal_size = good_size
+        if replayed:
+            print(f"📜 Odtworzono {replayed} wpisów z {self.journal_path}.")
+        return data
+
+    def write(self, ops, snapshot):
+        if snapshot is not None:
+            write_atomic(self.path, json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")))
+            with open(self.journal_path, "w", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_size = 0
+            return
+        payload = "".join(json.dumps(op, ensure_ascii=False, separators=(",", ":")) + "\n" for op in ops)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_size += len(payload.encode("utf-8"))
+
+
+def apply_giveaway_op(data: dict, op):
+    # replays one journal record onto a loaded snapshot
+    kind = op[0]
+    if kind == "create":
+        g = op[1]
+        data[str(g["message_id"])] = g
+        return
+    g = data.get(str(op[1]))
+    if g is None:
+        return
+    if kind == "join":
+        g["participants"] = ParticipantSet.coerce(g.get("participants"))
+        g["participants"].add(op[2], op[3] if len(op) > 3 else 1)
+    elif kind == "finish":
+        g["winners"] = op[2]
+        g["ended"] = True
+    elif kind == "reroll":
+        g["winners"] = op[2]
+    elif kind == "archive":
+        del data[str(op[1])]
+
+
+class JsonTicketBackend:
+    wants_snapshot = True
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        return read_json(self.path)
+
+    def write(self, ops, snapshot):
+        write_atomic(self.path, json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")))
+
+
+# ---------------- cold storage (ended giveaways) ----------------
+class GiveawayArchive:
+    """Gzip JSONL shards per month of ``end_time`` plus a message_id -> shard index.
+
+    Shards are only ever appended to (each append is a new gzip member, which
+    readers handle transparently); the index is rewritten atomically.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.index = {}
+
+    def load_index(self):
+        self.index = read_json(self.index_path)
+
+    def __contains__(self, message_id):
+        return str(message_id) in self.index
+
+    def write(self, records):
+        os.makedirs(self.directory, exist_ok=True)
+        shards = {}
+        for g in records:
+            shard = time.strftime("%Y-%m", time.gmtime(int(g.get("end_time", 0)))) + ".jsonl.gz"
+            shards.setdefault(shard, []).append(g)
+        index = dict(self.index)
+        for shard, items in shards.items():
+            with gzip.open(os.path.join(self.directory, shard), "at", encoding="utf-8") as f:
+                for g in items:
+                    f.write(json.dumps(g, ensure_ascii=False, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for g in items:
+                index[str(g["message_id"])] = shard
+        write_atomic(self.index_path, json.dumps(index, separators=(",", ":")))
+        self.index = index
+
+    def read(self, message_id):
+        mid = str(message_id)
+        shard = self.index.get(mid)
+        if not shard:
+            return None
+        found = None
+        # streamed line by line; a giveaway archived twice keeps its latest copy
+        with gzip.open(os.path.join(self.directory, shard), "rt", encoding="utf-8") as f:
+            for line in f:
+                if mid not in line:
+                    continue
+                g = json.loads(line)
+                if str(g.get("message_id")) == mid:
+                    found = g
+        return found
+
+
+# ---------------- SQLite (WAL) ----------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS giveaways (
+    message_id INTEGER PRIMARY KEY,
+    guild_id INTEGER,
+    channel_id INTEGER,
+    title TEXT,
+    description TEXT,
+    reward TEXT,
+    end_time INTEGER NOT NULL,
+    winners_count INTEGER NOT NULL DEFAULT 1,
+    winners TEXT NOT NULL DEFAULT '[]',
+    ended INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_giveaways_due ON giveaways (ended, end_time);
+CREATE TABLE IF NOT EXISTS participants (
+    giveaway_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    weight INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (giveaway_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    channel_id INTEGER,
+    opened_at INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tickets_owner ON tickets (guild_id, member_id, category);
+CREATE INDEX IF NOT EXISTS idx_tickets_channel ON tickets (channel_id);
+"""
+
+
+class SqliteBackend:
+    """Single SQLite database (WAL mode) holding giveaways, participants and open tickets.
+
+    All methods are blocking and meant to be called through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(participants)")}
+        if "weight" not in columns:
+            self.conn.execute("ALTER TABLE participants ADD COLUMN weight INTEGER NOT NULL DEFAULT 1")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # ---- giveaways ----
+    def load_giveaways(self):
+        with self._lock:
+            data = {}
+            rows = self.conn.execute(
+                "SELECT message_id, guild_id, channel_id, title, description, reward, end_time, "
+                "winners_count, winners, ended FROM giveaways"
+            )
+            for row in rows:
+                mid = row[0]
+                g = {"message_id": mid}
+                g.update(zip(GIVEAWAY_FIELDS, row[1:8]))
+                g["winners"] = json.loads(row[8])
+                g["ended"] = bool(row[9])
+                g["participants"] = ParticipantSet()
+                data[str(mid)] = g
+            # rowid order == join order
+            rows = self.conn.execute("SELECT giveaway_id, user_id, weight FROM participants ORDER BY rowid")
+            for gid, uid, weight in rows:
+                g = data.get(str(gid))
+                if g is not None:
+                    g["participants"].add(uid, weight)
+            return data
+
+    def apply_giveaway_ops(self, ops):
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            for op in ops:
+                self._apply_giveaway_op(op)
+
+    def _apply_giveaway_op(self, op):
+        kind = op[0]
+        if kind == "create":
+            g = op[1]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO giveaways (message_id, guild_id, channel_id, title, description, reward, "
+                "end_time, winners_count, winners, ended) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (int(g["message_id"]), *(g.get(k) for k in GIVEAWAY_FIELDS),
+                 json.dumps(g.get("winners", [])), int(bool(g.get("ended")))),
+            )
+            participants = ParticipantSet.coerce(g.get("participants"))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO participants (giveaway_id, user_id, weight) VALUES (?, ?, ?)",
+                ((int(g["message_id"]), uid, weight) for uid, weight in participants.entries()),
+            )
+        elif kind == "join":
+            self.conn.execute(
+                "INSERT OR IGNORE INTO participants (giveaway_id, user_id, weight) VALUES (?, ?, ?)",
+                (int(op[1]), int(op[2]), op[3] if len(op) > 3 else 1),
+            )
+        elif kind == "finish":
+            self.conn.execute(
+                "UPDATE giveaways SET ended = 1, winners = ? WHERE message_id = ?", (json.dumps(op[2]), int(op[1]))
+            )
+        elif kind == "reroll":
+            self.conn.execute("UPDATE giveaways SET winners = ? WHERE message_id = ?", (json.dumps(op[2]), int(op[1])))
+        elif kind == "archive":
+            self.conn.execute("DELETE FROM participants WHERE giveaway_id = ?", (int(op[1]),))
+            self.conn.execute("DELETE FROM giveaways WHERE message_id = ?", (int(op[1]),))
+
+    # ---- tickets ----
+    def load_tickets(self):
+        with self._lock:
+            data = {}
+            rows = self.conn.execute("SELECT guild_id, member_id, category, channel_id FROM tickets ORDER BY id")
+            for gid, mid, category, channel_id in rows:
+                data.setdefault(str(gid), {}).setdefault(str(mid), {})[category] = channel_id
+            return data
+
+    def apply_ticket_ops(self, ops):
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            for op in ops:
+                if op[0] == "open":
+                    _, gid, mid, category, channel_id = op
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO tickets (guild_id, member_id, category, channel_id, opened_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (int(gid), int(mid), category, channel_id, int(time.time())),
+                    )
+                elif op[0] == "close":
+                    _, gid, mid, category = op
+                    self.conn.execute(
+                        "DELETE FROM tickets WHERE guild_id = ? AND member_id = ? AND category = ?",
+                        (int(gid), int(mid), category),
+                    )
+
+    # ---- one-shot import ----
+    def import_json(self, giveaways_path: str, tickets_path: str):
+        with self._lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                return False
+        # snapshot plus journal replay, so nothing since the last compaction is dropped
+        giveaways = JournalGiveawayBackend(giveaways_path).load()
+        tickets = read_json(tickets_path)
+        self.apply_giveaway_ops([("create", g) for g in giveaways.values()])
+        self.apply_ticket_ops([
+            ("open", gid, mid, category, channel_id)
+            for gid, members in tickets.items()
+            for mid, categories in members.items()
+            for category, channel_id in (categories.items() if isinstance(categories, dict) else dict.fromkeys(categories).items())
+        ])
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', ?)", (str(int(time.time())),))
+        print(f"📥 Zaimportowano {len(giveaways)} giveawayów i tickety z JSON do {self.path}.")
+        return True
+
+
+class SqliteGiveawayBackend:
+    wants_snapshot = False
+
+    def __init__(self, db: SqliteBackend):
+        self.db = db
+
+    def load(self):
+        return self.db.load_giveaways()
+
+    def write(self, ops, snapshot):
+        self.db.apply_giveaway_ops(ops)
+
+
+class SqliteTicketBackend:
+    wants_snapshot = False
+
+    def __init__(self, db: SqliteBackend):
+        self.db = db
+
+    def load(self):
+        return self.db.load_tickets()
+
+    def write(self, ops, snapshot):
+        self.db.apply_ticket_ops(ops)
+
+
+_sqlite = None
+
+def get_sqlite():
+    global _sqlite
+    if _sqlite is None:
+        _sqlite = SqliteBackend(STORAGE_DB)
+        # first start on SQLite: pull in whatever the JSON files still hold
+        _sqlite.import_json("giveaways.json", "active_tickets.json")
+    return _sqlite
+
+
+def giveaway_backend(json_path: str):
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteGiveawayBackend(get_sqlite())
+    if STORAGE_BACKEND == "json":
+        return JsonGiveawayBackend(json_path)
+    return JournalGiveawayBackend(json_path)
+
+
+def ticket_backend(json_path: str):
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteTicketBackend(get_sqlite())
+    return JsonTicketBackend(json_path)
+
+
+# python storage.py import [giveaways.json] [active_tickets.json]
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "import":
+        print("Użycie: python storage.py import [giveaways.json] [active_tickets.json]")
+        sys.exit(1)
+    args = sys.argv[2:] + ["giveaways.json", "active_tickets.json"][len(sys.argv[2:]):]
+    if not SqliteBackend(STORAGE_DB).import_json(args[0], args[1]):
+        print("ℹ️ Import był już wykonany wcześniej.")
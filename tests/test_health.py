@@ -0,0 +1,41 @@
+# /readyz must go green once the bot's real extension list has loaded.
+import asyncio
+import json
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402  (importing doesn't start the bot)
+from health import HealthServer  # noqa: E402
+
+
+async def readiness_after_startup():
+    bot = main.bot
+    async with bot:
+        await main.load_extensions()
+        loaded = sorted(bot.extensions)
+        server = HealthServer(bot, main.REQUIRED_EXTENSIONS)
+        before = await server.readiness(None)
+
+        # what a gateway login would leave behind
+        bot._ready.set()
+        bot.ws = types.SimpleNamespace(latency=0.05)
+        try:
+            after = await server.readiness(None)
+        finally:
+            bot.ws = None
+            await bot.get_cog("GiveawayCog").store.stop()
+    return loaded, before, after
+
+
+def test_readyz_green_with_real_extensions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    loaded, before, after = asyncio.run(readiness_after_startup())
+
+    assert set(main.EXTENSIONS) <= set(loaded)
+    assert before.status == 503
+    assert after.status == 200, after.text
+    body = json.loads(after.text)
+    assert body["status"] == "ready" and body["missing_extensions"] == []
@@ -0,0 +1,115 @@
+# throttle.py — per-user / per-guild token buckets in front of expensive interactions
+import math
+import os
+import time
+from collections import OrderedDict
+
+import discord
+
+import metrics
+
+THROTTLE_MAX_KEYS = int(os.getenv("THROTTLE_MAX_KEYS", "50000"))  # buckets kept per limiter
+
+rejections = metrics.Counter(
+    "victorreps_throttle_rejections_total", "Interactions rejected by a token bucket.", ("action", "scope"))
+
+
+def parse_limit(value: str):
+    # "rate/burst": tokens per second and bucket size, e.g. "0.5/3"; "0" disables the limit
+    rate, _, burst = value.partition("/")
+    rate = float(rate)
+    return rate, max(float(burst or 1), 1.0)
+
+
+class TokenBuckets:
+    """Token buckets keyed by id, kept in an LRU ``OrderedDict``.
+
+    A bucket that has been idle long enough to refill completely is identical
+    to a fresh one, so it is dropped; the dict never holds more than
+    ``max_keys`` buckets either, oldest first.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = THROTTLE_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.idle_after = burst / rate if rate > 0 else 0
+        self._buckets = OrderedDict()  # key -> [tokens, updated]
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def wait(self, key, now: float) -> float:
+        # seconds until ``key`` has a whole token (0 = can take one now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return 0.0
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def take(self, key, now: float):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            self._buckets.move_to_end(key)
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate) - 1
+        bucket[1] = now
+        self._evict(now)
+
+    def _evict(self, now: float):
+        buckets = self._buckets
+        while buckets:
+            key, (tokens, updated) = next(iter(buckets.items()))
+            if len(buckets) <= self.max_keys and now - updated < self.idle_after:
+                break
+            del buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class Throttle:
+    """One user bucket and one guild bucket per action; a click needs a token from both."""
+
+    def __init__(self, action: str, user_limit: str, guild_limit: str):
+        self.action = action
+        self.users = TokenBuckets(*parse_limit(os.getenv(f"THROTTLE_{action.upper()}_USER", user_limit)))
+        self.guilds = TokenBuckets(*parse_limit(os.getenv(f"THROTTLE_{action.upper()}_GUILD", guild_limit)))
+
+    def check(self, interaction: discord.Interaction) -> float:
+        """Take a token for this interaction; returns 0 if allowed, else seconds to wait."""
+        now = time.monotonic()
+        user_id = interaction.user.id
+        guild_id = interaction.guild_id
+        user_wait = self.users.wait(user_id, now) if self.users.enabled else 0.0
+        guild_wait = self.guilds.wait(guild_id, now) if self.guilds.enabled and guild_id else 0.0
+        if user_wait or guild_wait:
+            rejections.inc(self.action, "user" if user_wait else "guild")
+            return max(user_wait, guild_wait)
+        if self.users.enabled:
+            self.users.take(user_id, now)
+        if self.guilds.enabled and guild_id:
+            self.guilds.take(guild_id, now)
+        return 0.0
+
+    async def reject(self, interaction: discord.Interaction) -> bool:
+        # answers a throttled interaction with one ephemeral message; True if it was throttled
+        wait = self.check(interaction)
+        if not wait:
+            return False
+        try:
+            await interaction.response.send_message(
+                f"⏳ Zbyt wiele prób. Spróbuj ponownie za {math.ceil(wait)} s.", ephemeral=True
+            )
+        except Exception:
+            pass
+        return True
+
+
+# every entrant of a giveaway shares its guild, so a guild bucket would throttle the join
+# storm itself; per-user buckets are the protection here (THROTTLE_GIVEAWAY_JOIN_GUILD to opt in)
+giveaway_join = Throttle("giveaway_join", "0.5/3", "0")
+ticket_button = Throttle("ticket_button", "0.2/3", "5/20")
+ticket_modal = Throttle("ticket_modal", "0.1/2", "2/10")
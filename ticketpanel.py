@@ -1,36 +1,312 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 from discord.ui import View, Button, Modal, TextInput
 import asyncio
+import gzip
+import heapq
+import html
 import json
 import os
+import time
+
+import storage
+import throttle
 
 ACTIVE_FILE = "active_tickets.json"
-active_tickets = {}  # {guild_id: {user_id: [kategorie]}}
+TICKET_POOL_SIZE = int(os.getenv("TICKET_POOL_SIZE", "0"))  # pre-created channels per guild, 0 = off
+POOL_PREFIX = "ticket-pool"
+TRANSCRIPT_DIR = "transcripts"
+TRANSCRIPT_HTML = os.getenv("TICKET_TRANSCRIPT_HTML", "0") == "1"  # also render a .html.gz next to the JSONL
+TRANSCRIPT_CONCURRENCY = int(os.getenv("TICKET_TRANSCRIPT_CONCURRENCY", "2"))  # channels archived at once
+TRANSCRIPT_BATCH = 100  # messages per write, matches one history page
+TRANSCRIPT_RETRIES = 3  # attempts before a close gives up and keeps the channel
+IDLE_WARN = float(os.getenv("TICKET_IDLE_WARN_HOURS", "0")) * 3600  # silence before a warning, 0 = off (opt-in)
+IDLE_CLOSE = float(os.getenv("TICKET_IDLE_CLOSE_HOURS", "24")) * 3600  # silence after the warning before closing
+IDLE_WARNINGS_FILE = "idle_warnings.json"  # {channel_id: warned_at}, survives restarts
+active_tickets = {}  # {guild_id: {user_id: {kategoria: channel_id}}}
+ticket_index = {}  # {channel_id: (guild_id, user_id, kategoria)}
+ticket_backend = storage.ticket_backend(ACTIVE_FILE)
+_save_lock = asyncio.Lock()
 
 # ---- helpers (save/load) ----
 def load_active():
     global active_tickets
-    if os.path.exists(ACTIVE_FILE):
+    try:
+        # keys are strings in both backends (JSON stores keys as strings);
+        # old files hold a plain list of categories without channel ids
+        active_tickets = {
+            g: {m: dict(cats) if isinstance(cats, dict) else dict.fromkeys(cats) for m, cats in members.items()}
+            for g, members in ticket_backend.load().items()
+        }
+    except Exception:
+        active_tickets = {}
+    ticket_index.clear()
+    for g, members in active_tickets.items():
+        for m, cats in members.items():
+            for category, channel_id in cats.items():
+                if channel_id:
+                    ticket_index[int(channel_id)] = (g, m, category)
+
+def open_ticket(g_id: str, m_id: str, category: str, channel_id=None):
+    active_tickets.setdefault(g_id, {}).setdefault(m_id, {})[category] = channel_id
+    if channel_id:
+        ticket_index[int(channel_id)] = (g_id, m_id, category)
+        idle_tickets.touch(int(channel_id))
+
+def drop_ticket(g_id: str, m_id: str, category: str) -> bool:
+    cats = active_tickets.get(g_id, {}).get(m_id)
+    if not cats or category not in cats:
+        return False
+    channel_id = cats.pop(category)
+    if channel_id:
+        ticket_index.pop(int(channel_id), None)
+        idle_tickets.forget(int(channel_id))
+    if not cats:
+        del active_tickets[g_id][m_id]
+        if not active_tickets[g_id]:
+            del active_tickets[g_id]
+    return True
+
+async def save_active(*ops):
+    # op: ("open", guild_id, member_id, category, channel_id) / ("close", guild_id, member_id, category)
+    if not ops:
+        return
+    async with _save_lock:
+        snapshot = None
+        if ticket_backend.wants_snapshot:
+            snapshot = {g: {m: dict(cats) for m, cats in members.items()} for g, members in active_tickets.items()}
         try:
-            with open(ACTIVE_FILE, "r", encoding="utf-8") as f:
-                active_tickets = json.load(f)
-                # keys in JSON are strings, convert nested lists as needed
+            await asyncio.to_thread(ticket_backend.write, list(ops), snapshot)
         except Exception:
-            active_tickets = {}
-    else:
-        active_tickets = {}
+            pass
 
-def save_active():
-    try:
-        with open(ACTIVE_FILE, "w", encoding="utf-8") as f:
-            json.dump(active_tickets, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+async def forget_ticket(channel_id: int):
+    # ticket channel is gone (closed or deleted by hand): drop it from the index and the store
+    entry = ticket_index.get(int(channel_id))
+    if entry and drop_ticket(*entry):
+        await save_active(("close", *entry))
 
 load_active()
 
+# ------------------ CACHE KATEGORII I UPRAWNIEŃ ------------------
+TICKET_CATEGORY = "🎟️・TICKETY"
+CATEGORY_LIMIT = 50  # Discord's max channels per category
+OVERFLOW_IDLE = int(os.getenv("TICKET_OVERFLOW_IDLE", "900"))  # seconds before an empty overflow category is removed
+
+def is_staff_role(role: discord.Role) -> bool:
+    return role.permissions.manage_messages or role.permissions.administrator
+
+
+def shard_index(name: str):
+    # "🎟️・TICKETY" -> 1, "🎟️・TICKETY-2" -> 2, anything else -> None
+    if name == TICKET_CATEGORY:
+        return 1
+    prefix = f"{TICKET_CATEGORY}-"
+    if name.startswith(prefix) and name[len(prefix):].isdigit():
+        return int(name[len(prefix):])
+    return None
+
+
+class TicketGuildCache:
+    """Per-guild ticket categories (sharded) and precomputed staff overwrites.
+
+    Discord caps a category at CATEGORY_LIMIT channels, so tickets go to the
+    least-loaded of "🎟️・TICKETY", "🎟️・TICKETY-2", …; overflow categories are
+    created on demand and pruned once they stay empty for OVERFLOW_IDLE seconds.
+    Entries are dropped by the role/channel gateway listeners in TicketPanelCog,
+    so a ticket normally costs one REST call (create_text_channel).
+    """
+
+    def __init__(self):
+        self._staff = {}  # guild_id -> {role: PermissionOverwrite}
+        self._shards = {}  # guild_id -> [CategoryChannel] with up-to-date overwrites, main first
+        self._counts = {}  # category_id -> channels in it, including reserved slots
+        self._empty_since = {}  # overflow category_id -> monotonic time it became empty
+        self._locks = {}
+
+    def staff_overwrites(self, guild: discord.Guild) -> dict:
+        staff = self._staff.get(guild.id)
+        if staff is None:
+            # admini widzą tickety
+            staff = {
+                role: discord.PermissionOverwrite(view_channel=True, send_messages=True)
+                for role in guild.roles if is_staff_role(role)
+            }
+            self._staff[guild.id] = staff
+        return staff
+
+    def base_overwrites(self, guild: discord.Guild) -> dict:
+        return {guild.default_role: discord.PermissionOverwrite(view_channel=False), **self.staff_overwrites(guild)}
+
+    def load(self, category) -> int:
+        # the guild cache catches channels created by hand, the counter catches in-flight creates
+        return max(self._counts.get(category.id, 0), len(category.channels))
+
+    async def _load_shards(self, guild: discord.Guild):
+        base = self.base_overwrites(guild)
+        shards = sorted(
+            (c for c in guild.categories if shard_index(c.name) is not None),
+            key=lambda c: shard_index(c.name)
+        )
+        for category in shards:
+            # only on cache fill (startup or after a role/category change), not per ticket
+            if category.overwrites != base:
+                try:
+                    await category.edit(overwrites=base)
+                except Exception:
+                    pass
+            self._counts[category.id] = len(category.channels)
+        self._shards[guild.id] = shards
+        return shards
+
+    async def acquire(self, guild: discord.Guild) -> discord.CategoryChannel:
+        """Reserve a slot in the least-loaded ticket category, creating an overflow one if all are full."""
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            shards = self._shards.get(guild.id)
+            if shards is None:
+                shards = await self._load_shards(guild)
+            shards[:] = [c for c in shards if guild.get_channel(c.id) is not None]
+
+            open_shards = [c for c in shards if self.load(c) < CATEGORY_LIMIT]
+            if open_shards:
+                category = min(open_shards, key=self.load)
+            else:
+                taken = {shard_index(c.name) for c in shards}
+                index = next(i for i in range(1, len(taken) + 2) if i not in taken)
+                name = TICKET_CATEGORY if index == 1 else f"{TICKET_CATEGORY}-{index}"
+                kwargs = {"position": 0} if index == 1 else {}
+                category = await guild.create_category(name=name, overwrites=self.base_overwrites(guild), **kwargs)
+                shards.append(category)
+                shards.sort(key=lambda c: shard_index(c.name))
+                self._counts[category.id] = 0
+
+            self._counts[category.id] = self.load(category) + 1
+            self._empty_since.pop(category.id, None)
+            return category
+
+    def track(self, category_id):
+        # a channel was moved into one of our categories
+        if category_id in self._counts:
+            self._counts[category_id] += 1
+            self._empty_since.pop(category_id, None)
+
+    def release(self, category_id):
+        if category_id not in self._counts:
+            return
+        self._counts[category_id] = max(0, self._counts[category_id] - 1)
+        if self._counts[category_id] == 0:
+            self._empty_since[category_id] = time.monotonic()
+
+    async def prune(self, guild: discord.Guild):
+        # delete overflow categories (never the main one) that stayed empty long enough
+        shards = self._shards.get(guild.id) or []
+        now = time.monotonic()
+        for category in list(shards):
+            if shard_index(category.name) == 1 or category.channels:
+                continue
+            since = self._empty_since.get(category.id)
+            if since is None or now - since < OVERFLOW_IDLE:
+                continue
+            async with self._locks.setdefault(guild.id, asyncio.Lock()):
+                if category.channels or self._counts.get(category.id):
+                    continue
+                try:
+                    await category.delete(reason="Pusta kategoria ticketów")
+                except Exception:
+                    continue
+                shards.remove(category)
+                self._counts.pop(category.id, None)
+                self._empty_since.pop(category.id, None)
+
+    def invalidate_roles(self, guild_id: int):
+        # staff set changed: recompute overwrites and resync the categories once
+        self._staff.pop(guild_id, None)
+        self._shards.pop(guild_id, None)
+
+    def invalidate_channel(self, channel, deleted: bool = False):
+        shards = self._shards.get(channel.guild.id) or []
+        if all(c.id != channel.id for c in shards):
+            return
+        # our own category.edit also fires channel_update; only react to real drift
+        if deleted or shard_index(channel.name) is None or channel.overwrites != self.base_overwrites(channel.guild):
+            self._shards.pop(channel.guild.id, None)
+            if deleted:
+                self._counts.pop(channel.id, None)
+                self._empty_since.pop(channel.id, None)
+
+    def forget_guild(self, guild_id: int):
+        self._staff.pop(guild_id, None)
+        for category in self._shards.pop(guild_id, None) or []:
+            self._counts.pop(category.id, None)
+            self._empty_since.pop(category.id, None)
+
+
+guild_cache = TicketGuildCache()
+
+
+# ------------------ PULA GOTOWYCH KANAŁÓW ------------------
+class TicketChannelPool:
+    """Small per-guild stock of hidden, pre-created ticket channels.
+
+    Claiming one costs a single channel.edit (name, topic, member overwrite)
+    instead of create_text_channel; the pool is topped up in the background.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._channels = {}  # guild_id -> [TextChannel]
+        self._refilling = set()
+        self._counter = 0
+
+    def adopt(self, guild: discord.Guild):
+        # pick up pool channels left over from before a restart
+        self._channels[guild.id] = [
+            ch for ch in guild.text_channels
+            if ch.name.startswith(POOL_PREFIX) and ch.category and shard_index(ch.category.name) is not None
+        ]
+
+    def claim(self, guild: discord.Guild):
+        channels = self._channels.get(guild.id, [])
+        while channels:
+            channel = channels.pop()
+            if guild.get_channel(channel.id) is not None:
+                self.refill(guild)
+                return channel
+        self.refill(guild)
+        return None
+
+    def refill(self, guild: discord.Guild):
+        if self.size <= 0 or guild.id in self._refilling:
+            return
+        self._refilling.add(guild.id)
+        asyncio.create_task(self._refill(guild))
+
+    async def _refill(self, guild: discord.Guild):
+        try:
+            channels = self._channels.setdefault(guild.id, [])
+            while len(channels) < self.size:
+                self._counter += 1
+                category = await guild_cache.acquire(guild)
+                try:
+                    channel = await guild.create_text_channel(
+                        name=f"{POOL_PREFIX}-{self._counter}",
+                        category=category,
+                        overwrites=guild_cache.base_overwrites(guild)
+                    )
+                except Exception:
+                    guild_cache.release(category.id)
+                    raise
+                channels.append(channel)
+        except Exception as e:
+            print(f"❌ Błąd uzupełniania puli ticketów ({guild.id}): {e}")
+        finally:
+            self._refilling.discard(guild.id)
+
+
+channel_pool = TicketChannelPool(TICKET_POOL_SIZE)
+
 # ------------------ MODAL OTWIERANIA TICKETA ------------------
 class TicketModal(Modal, title="🎫 Utwórz ticket"):
     def __init__(self, category_name: str):
@@ -46,6 +322,8 @@ class TicketModal(Modal, title="🎫 Utwórz ticket"):
         self.add_item(self.problem)
 
     async def on_submit(self, interaction: discord.Interaction):
+        if await throttle.ticket_modal.reject(interaction):
+            return
         guild = interaction.guild
         member = interaction.user
 
@@ -53,60 +331,56 @@ class TicketModal(Modal, title="🎫 Utwórz ticket"):
         g_id = str(guild.id)
         m_id = str(member.id)
 
-        if g_id not in active_tickets:
-            active_tickets[g_id] = {}
-        if m_id not in active_tickets[g_id]:
-            active_tickets[g_id][m_id] = []
-
         # --- użytkownik ma już ticket ---
-        if self.category_name in active_tickets[g_id][m_id]:
+        if self.category_name in active_tickets.get(g_id, {}).get(m_id, {}):
             await interaction.response.send_message(
                 "⚠️ Masz już otwarty ticket w tej kategorii! Zamknij go, zanim utworzysz nowy.",
                 ephemeral=True
             )
             return
 
+        # reserve right away so a double submit can't open two tickets
+        open_ticket(g_id, m_id, self.category_name)
+        # answer within the 3 s window no matter how slow the REST calls below are
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
         # --- uprawnienia ---
         overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            **guild_cache.base_overwrites(guild),
             member: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True),
         }
 
-        # admini widzą tickety
-        for role in guild.roles:
-            if role.permissions.manage_messages or role.permissions.administrator:
-                overwrites[role] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
-
-        # --- główna kategoria ---
-        category_name = "🎟️・TICKETY"
-        category = discord.utils.get(guild.categories, name=category_name)
-
-        if not category:
-            category = await guild.create_category(name=category_name, overwrites=overwrites)
-            try:
-                await category.edit(position=0)
-            except Exception:
-                pass
-        else:
-            try:
-                await category.edit(overwrites=overwrites, position=0)
-            except Exception:
-                pass
-
         # sanitize channel name
         safe_name = discord.utils.remove_markdown(member.name).lower()[:20]
+        name = f"ticket-{safe_name}-{self.category_name.lower()}"
+        topic = f"Ticket użytkownika {member} ({self.category_name})"
 
-        # --- utworzenie kanału ---
-        ticket_channel = await guild.create_text_channel(
-            name=f"ticket-{safe_name}-{self.category_name.lower()}",
-            category=category,
-            topic=f"Ticket użytkownika {member} ({self.category_name})",
-            overwrites=overwrites
-        )
+        try:
+            ticket_channel = channel_pool.claim(guild)
+            if ticket_channel is not None:
+                # --- kanał z puli: jedno wywołanie REST ---
+                await ticket_channel.edit(name=name, topic=topic, overwrites=overwrites)
+            else:
+                # --- utworzenie kanału (najmniej obciążona kategoria) ---
+                category = await guild_cache.acquire(guild)
+                try:
+                    ticket_channel = await guild.create_text_channel(
+                        name=name,
+                        category=category,
+                        topic=topic,
+                        overwrites=overwrites
+                    )
+                except Exception:
+                    guild_cache.release(category.id)
+                    raise
+        except Exception:
+            drop_ticket(g_id, m_id, self.category_name)
+            await interaction.followup.send("❌ Nie udało się utworzyć ticketa. Spróbuj ponownie.", ephemeral=True)
+            return
 
         # zapisz aktywny ticket (store as strings)
-        active_tickets[g_id][m_id].append(self.category_name)
-        save_active()
+        open_ticket(g_id, m_id, self.category_name, ticket_channel.id)
+        await save_active(("open", g_id, m_id, self.category_name, ticket_channel.id))
 
         # --- embed w ticketcie ---
         embed = discord.Embed(
@@ -116,38 +390,337 @@ class TicketModal(Modal, title="🎫 Utwórz ticket"):
         )
         embed.set_footer(text="VictorReps | System Ticketów")
 
-        # --- przycisk zamknięcia ---
-        close_btn = Button(label="Zamknij ticket", style=discord.ButtonStyle.danger, emoji="🔒", custom_id=f"close_ticket:{ticket_channel.id}")
+        # --- przycisk zamknięcia (persistent, działa po restarcie) ---
+        view = View(timeout=None)
+        view.add_item(CloseTicketButton(ticket_channel.id))
+
+        await interaction.followup.send(f"✅ Ticket został utworzony: {ticket_channel.mention}", ephemeral=True)
+        await ticket_channel.send(content=f"{member.mention}", embed=embed, view=view)
+
+
+# ------------------ TRANSKRYPTY ------------------
+class TranscriptWriter:
+    # blocking gzip writers, driven from worker threads one batch at a time
+    def __init__(self, base_path: str, with_html: bool):
+        os.makedirs(os.path.dirname(base_path), exist_ok=True)
+        self.jsonl = gzip.open(f"{base_path}.jsonl.gz", "wt", encoding="utf-8")
+        self.html = gzip.open(f"{base_path}.html.gz", "wt", encoding="utf-8") if with_html else None
+        if self.html:
+            self.html.write(
+                "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Transkrypt</title></head>"
+                "<body style='font-family:sans-serif;background:#313338;color:#dbdee1'>\n"
+            )
 
-        async def close_callback(inter_close: discord.Interaction):
-            # allow requester or manage_channels
-            if inter_close.user == member or inter_close.user.guild_permissions.manage_channels:
-                await inter_close.response.send_message("🔒 Ticket zostanie zamknięty za 5 sekund...", ephemeral=True)
-                await asyncio.sleep(5)
+    def write(self, records):
+        for record in records:
+            self.jsonl.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            if self.html:
+                attachments = "".join(
+                    f"<br><a href='{html.escape(url)}'>{html.escape(url)}</a>" for url in record["attachments"]
+                )
+                self.html.write(
+                    f"<p><b>{html.escape(record['author'])}</b> "
+                    f"<small>{html.escape(record['created_at'])}</small><br>"
+                    f"{html.escape(record['content']).replace(chr(10), '<br>')}{attachments}</p>\n"
+                )
+
+    def close(self):
+        self.jsonl.close()
+        if self.html:
+            self.html.write("</body></html>\n")
+            self.html.close()
+
+
+class TranscriptArchiver:
+    """Background jobs that stream a ticket's history to gzip JSONL, then delete the channel.
+
+    History is consumed page by page, so memory stays flat however long the
+    ticket is; a semaphore caps how many channels are archived at once. One
+    job per channel: repeat submits are ignored while it runs, and the channel
+    is only deleted once its transcript has been written.
+    """
+
+    def __init__(self, concurrency: int, retries: int = TRANSCRIPT_RETRIES):
+        self._sem = asyncio.Semaphore(concurrency)
+        self._jobs = set()
+        self._closing = set()  # channel ids with a job queued or running
+        self.retries = retries
+
+    def closing(self, channel_id: int) -> bool:
+        return channel_id in self._closing
+
+    def submit(self, channel: discord.TextChannel, delay: float = 0):
+        # returns None if this channel is already being archived
+        if channel.id in self._closing:
+            return None
+        self._closing.add(channel.id)
+        task = asyncio.create_task(self._run(channel, delay))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+        return task
+
+    async def _run(self, channel: discord.TextChannel, delay: float):
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            async with self._sem:
+                for attempt in range(1, self.retries + 1):
+                    try:
+                        path = await self.archive(channel)
+                        print(f"🗂️ Zapisano transkrypt {path}")
+                        break
+                    except Exception as e:
+                        print(f"❌ Błąd transkryptu {channel.id} (próba {attempt}/{self.retries}): {e}")
+                        if attempt < self.retries:
+                            await asyncio.sleep(2 ** attempt)
+                else:
+                    # keep the channel rather than lose the conversation
+                    try:
+                        await channel.send("⚠️ Nie udało się zapisać transkryptu — kanał nie został usunięty. Spróbuj zamknąć ticket ponownie.")
+                    except Exception:
+                        pass
+                    return
                 try:
-                    await ticket_channel.delete()
+                    await channel.delete()
                 except Exception:
                     pass
+            # usuń z listy aktywnych
+            await forget_ticket(channel.id)
+        finally:
+            self._closing.discard(channel.id)
+
+    async def archive(self, channel: discord.TextChannel) -> str:
+        base_path = os.path.join(TRANSCRIPT_DIR, str(channel.guild.id), f"{channel.id}-{channel.name}")
+        writer = await asyncio.to_thread(TranscriptWriter, base_path, TRANSCRIPT_HTML)
+        try:
+            batch = []
+            async for message in channel.history(limit=None, oldest_first=True):
+                batch.append({
+                    "id": message.id,
+                    "author_id": message.author.id,
+                    "author": str(message.author),
+                    "created_at": message.created_at.isoformat(),
+                    "content": message.content,
+                    "attachments": [a.url for a in message.attachments],
+                    "embeds": [e.to_dict() for e in message.embeds],
+                })
+                if len(batch) >= TRANSCRIPT_BATCH:
+                    await asyncio.to_thread(writer.write, batch)
+                    batch = []
+            if batch:
+                await asyncio.to_thread(writer.write, batch)
+        finally:
+            await asyncio.to_thread(writer.close)
+        return f"{base_path}.jsonl.gz"
+
+
+transcripts = TranscriptArchiver(TRANSCRIPT_CONCURRENCY)
+
+
+# ------------------ AUTO-ZAMYKANIE NIEAKTYWNYCH ------------------
+class IdleTicketSweeper:
+    """Warns about and then closes tickets nobody has written in for a while.
+
+    ``touch`` is a dict store per message; deadlines sit in a lazy min-heap
+    and are re-checked against the latest activity only when they come due,
+    so one sleeping task covers every open ticket. Pending warnings are kept in
+    ``IDLE_WARNINGS_FILE`` so a restart does not restart the countdown.
+    """
+
+    def __init__(self, warn_after: float, close_after: float, warnings_path: str = IDLE_WARNINGS_FILE):
+        self.warn_after = warn_after
+        self.close_after = close_after
+        self.warnings_path = warnings_path
+        self.last_activity = {}  # {channel_id: timestamp}
+        self.warned = {}  # {channel_id: timestamp of the warning}, persisted
+        self._heap = []  # (deadline, channel_id), possibly stale
+        self._task = None
+        self._saver = None  # background task writing ``warned``
+        self._warned_dirty = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.warn_after > 0
+
+    def touch(self, channel_id: int, when: float = None):
+        if not self.enabled:
+            return
+        known = channel_id in self.last_activity
+        self.last_activity[channel_id] = when or time.time()
+        if self.warned.pop(channel_id, None) is not None:
+            self._save_warned()
+        if not known:
+            heapq.heappush(self._heap, (self.last_activity[channel_id] + self.warn_after, channel_id))
+
+    def forget(self, channel_id: int):
+        # heap entry is dropped when it comes due
+        self.last_activity.pop(channel_id, None)
+        if self.warned.pop(channel_id, None) is not None:
+            self._save_warned()
+
+    def _save_warned(self):
+        # called from on_message/drop_ticket: the write (fsync + rename) runs in a thread,
+        # one at a time, and changes made meanwhile are folded into the next write
+        self._warned_dirty = True
+        if self._saver is None or self._saver.done():
+            self._saver = asyncio.create_task(self._write_warned())
+
+    async def _write_warned(self):
+        while self._warned_dirty:
+            self._warned_dirty = False
+            payload = json.dumps({str(k): v for k, v in self.warned.items()})
+            try:
+                await asyncio.to_thread(storage.write_atomic, self.warnings_path, payload)
+            except Exception as e:
+                print(f"❌ Błąd zapisu ostrzeżeń o nieaktywności: {e}")
 
-                # usuń z listy aktywnych
-                g_id_local = str(guild.id)
-                m_id_local = str(member.id)
-                if g_id_local in active_tickets and m_id_local in active_tickets[g_id_local]:
-                    if self.category_name in active_tickets[g_id_local][m_id_local]:
-                        active_tickets[g_id_local][m_id_local].remove(self.category_name)
-                        save_active()
-            else:
-                await inter_close.response.send_message("⛔ Nie możesz zamknąć tego ticketa.", ephemeral=True)
+    def start(self, bot: commands.Bot):
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        saved = {int(k): v for k, v in storage.read_json(self.warnings_path).items()}
+        # seed from the newest message of every tracked channel (cache only, no REST)
+        for channel_id in ticket_index:
+            channel = bot.get_channel(channel_id)
+            last_id = getattr(channel, "last_message_id", None)
+            when = discord.utils.snowflake_time(last_id).timestamp() if last_id else None
+            self.last_activity.pop(channel_id, None)
+            self.warned.pop(channel_id, None)
+            self.touch(channel_id, when)
+            # the newest message may be our own warning: nothing newer than it means
+            # nobody answered, so the close countdown carries on from before the restart
+            warned_at = saved.get(channel_id)
+            if warned_at is not None and (when is None or when <= warned_at):
+                self.warned[channel_id] = warned_at
+                heapq.heappush(self._heap, (warned_at + self.close_after, channel_id))
+        if saved.keys() != self.warned.keys():
+            self._save_warned()
+        self._task = asyncio.create_task(self._run(bot))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self, bot: commands.Bot):
+        while True:
+            delay = self._heap[0][0] - time.time() if self._heap else 300
+            if delay > 0:
+                await asyncio.sleep(min(delay, 300))
+                continue
+            _, channel_id = heapq.heappop(self._heap)
+            try:
+                await self._check(bot, channel_id)
+            except Exception as e:
+                print(f"❌ Błąd auto-zamykania ticketa {channel_id}: {e}")
+
+    async def _check(self, bot: commands.Bot, channel_id: int):
+        last = self.last_activity.get(channel_id)
+        if last is None or channel_id not in ticket_index:
+            self.forget(channel_id)
+            return
+        now = time.time()
+        warned_at = self.warned.get(channel_id)
+        if warned_at is None:
+            if now < last + self.warn_after:
+                # activity since this entry was pushed
+                heapq.heappush(self._heap, (last + self.warn_after, channel_id))
+                return
+            channel = bot.get_channel(channel_id)
+            if channel is None:
+                await forget_ticket(channel_id)
+                return
+            owner_id = ticket_index[channel_id][1]
+            warning = await channel.send(
+                f"⏰ <@{owner_id}> Ten ticket jest nieaktywny od {self.warn_after / 3600:g} h. "
+                f"Zostanie automatycznie zamknięty za {self.close_after / 3600:g} h, jeśli nikt nie odpowie."
+            )
+            # the warning's own timestamp, so on restart it is not mistaken for a reply
+            warned_at = warning.created_at.timestamp()
+            self.warned[channel_id] = warned_at
+            self._save_warned()
+            heapq.heappush(self._heap, (warned_at + self.close_after, channel_id))
+            return
+        if now < warned_at + self.close_after:
+            heapq.heappush(self._heap, (warned_at + self.close_after, channel_id))
+            return
+        channel = bot.get_channel(channel_id)
+        self.forget(channel_id)
+        if channel is None:
+            await forget_ticket(channel_id)
+            return
+        if transcripts.closing(channel_id):
+            return
+        await channel.send("🔒 Ticket został zamknięty z powodu braku aktywności.")
+        transcripts.submit(channel)
 
-        close_btn.callback = close_callback
 
-        view = View(timeout=None)
-        view.add_item(close_btn)
+idle_tickets = IdleTicketSweeper(IDLE_WARN, IDLE_CLOSE)
 
-        await ticket_channel.send(content=f"{member.mention}", embed=embed, view=view)
-        await interaction.response.send_message(
-            f"✅ Ticket został utworzony: {ticket_channel.mention}", ephemeral=True
+
+# ------------------ ZAMYKANIE TICKETA ------------------
+class CloseTicketButton(discord.ui.DynamicItem[Button], template=r"close_ticket:(?P<channel_id>[0-9]+)"):
+    # matched by custom_id pattern, so close buttons of every open ticket survive restarts
+    def __init__(self, channel_id: int):
+        super().__init__(
+            Button(label="Zamknij ticket", style=discord.ButtonStyle.danger, emoji="🔒", custom_id=f"close_ticket:{channel_id}")
         )
+        self.channel_id = channel_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match):
+        return cls(int(match["channel_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        entry = ticket_index.get(self.channel_id)
+        owner_id = int(entry[1]) if entry else None
+        # allow requester or manage_channels
+        if interaction.user.id != owner_id and not interaction.user.guild_permissions.manage_channels:
+            await interaction.response.send_message("⛔ Nie możesz zamknąć tego ticketa.", ephemeral=True)
+            return
+
+        if transcripts.closing(interaction.channel.id):
+            await interaction.response.send_message("⏳ Ten ticket jest już zamykany.", ephemeral=True)
+            return
+
+        # transcript, delete and cleanup run as a background job
+        transcripts.submit(interaction.channel, delay=5)
+        await interaction.response.send_message("🔒 Ticket zostanie zamknięty za 5 sekund...", ephemeral=True)
+
+
+def find_ticket_channel(guild: discord.Guild, m_id: str, category: str):
+    # legacy entries have no channel id: match by name suffix + member overwrite, cache only
+    suffix = f"-{category.lower()}"
+    for channel in guild.text_channels:
+        if not channel.category or shard_index(channel.category.name) is None or not channel.name.endswith(suffix):
+            continue
+        if any(target.id == int(m_id) for target in channel.overwrites):
+            return channel
+    return None
+
+
+async def reconcile_tickets(bot: commands.Bot):
+    """Check the ticket index against each guild's cached channels and repair drift in one write."""
+    ops = []
+    removed = linked = 0
+    for g_id, members in list(active_tickets.items()):
+        guild = bot.get_guild(int(g_id))
+        if guild is None or guild.unavailable:
+            continue
+        for m_id, cats in list(members.items()):
+            for category, channel_id in list(cats.items()):
+                if channel_id and guild.get_channel(int(channel_id)) is not None:
+                    continue
+                channel = None if channel_id else find_ticket_channel(guild, m_id, category)
+                if channel is not None:
+                    open_ticket(g_id, m_id, category, channel.id)
+                    ops.append(("open", g_id, m_id, category, channel.id))
+                    linked += 1
+                else:
+                    drop_ticket(g_id, m_id, category)
+                    ops.append(("close", g_id, m_id, category))
+                    removed += 1
+    await save_active(*ops)
+    if ops:
+        print(f"🧹 Tickety uzgodnione: {removed} usuniętych, {linked} przypisanych do kanałów.")
 
 
 # ------------------ PRZYCISKI NA PANELU ------------------
@@ -157,6 +730,8 @@ class TicketButton(Button):
         super().__init__(label=label, emoji=emoji, style=discord.ButtonStyle.secondary, custom_id=f"ticket_btn:{label}")
 
     async def callback(self, interaction: discord.Interaction):
+        if await throttle.ticket_button.reject(interaction):
+            return
         modal = TicketModal(self.label)
         await interaction.response.send_modal(modal)
 
@@ -184,6 +759,72 @@ class TicketPanelCog(commands.Cog):
         # ensure persistent view registered when cog is loaded
         # bot.add_view requires View with persistent children (custom_id) and timeout=None
         bot.add_view(TicketPanel())
+        self.prune_categories.start()
+
+    def cog_unload(self):
+        self.prune_categories.cancel()
+        idle_tickets.stop()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await reconcile_tickets(self.bot)
+        idle_tickets.start(self.bot)
+        if channel_pool.size > 0:
+            for guild in self.bot.guilds:
+                channel_pool.adopt(guild)
+                channel_pool.refill(guild)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        # the bot's own messages (incl. the idle warning) don't count as activity
+        if message.channel.id in ticket_index and not message.author.bot:
+            idle_tickets.touch(message.channel.id)
+
+    # ---- invalidacja cache kategorii/uprawnień ----
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        if is_staff_role(role):
+            guild_cache.invalidate_roles(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        if is_staff_role(role):
+            guild_cache.invalidate_roles(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if is_staff_role(before) != is_staff_role(after):
+            guild_cache.invalidate_roles(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        guild_cache.invalidate_channel(after)
+        # channel moved between categories: keep the per-category counts honest
+        before_cat = getattr(before, "category_id", None)
+        after_cat = getattr(after, "category_id", None)
+        if before_cat != after_cat:
+            guild_cache.release(before_cat)
+            guild_cache.track(after_cat)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        guild_cache.invalidate_channel(channel, deleted=True)
+        guild_cache.release(getattr(channel, "category_id", None))
+        if channel.id in ticket_index:
+            await forget_ticket(channel.id)
+
+    @tasks.loop(minutes=5)
+    async def prune_categories(self):
+        for guild in self.bot.guilds:
+            await guild_cache.prune(guild)
+
+    @prune_categories.before_loop
+    async def before_prune(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        guild_cache.forget_guild(guild.id)
 
     @app_commands.command(name="ticketpanel", description="Wyświetla panel ticketów (dla właściciela lub admina).")
     async def ticketpanel_cmd(self, interaction: discord.Interaction):
@@ -216,5 +857,7 @@ async def setup(bot):
     # ensure active tickets loaded
     load_active()
     await bot.add_cog(TicketPanelCog(bot))
+    # close buttons are matched by custom_id pattern, not per-message views
+    bot.add_dynamic_items(CloseTicketButton)
     # register persistent view (redundant-safe)
     bot.add_view(TicketPanel())